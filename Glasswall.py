@@ -1,4 +1,324 @@
 import ctypes as ct
+import hashlib
+
+# Creates a read-only memoryview over memory owned by the Glasswall library without copying it
+_PyMemoryView_FromMemory = ct.pythonapi.PyMemoryView_FromMemory
+_PyMemoryView_FromMemory.argtypes = [ct.c_void_p, ct.c_ssize_t, ct.c_int]
+_PyMemoryView_FromMemory.restype = ct.py_object
+_PyBUF_READ = 0x100
+
+class _Py_buffer(ct.Structure):
+    """The C layout of a Py_buffer, as filled in by PyObject_GetBuffer."""
+
+    _fields_ = [
+        ("buf", ct.c_void_p),
+        ("obj", ct.c_void_p),
+        ("len", ct.c_ssize_t),
+        ("itemsize", ct.c_ssize_t),
+        ("readonly", ct.c_int),
+        ("ndim", ct.c_int),
+        ("format", ct.c_char_p),
+        ("shape", ct.POINTER(ct.c_ssize_t)),
+        ("strides", ct.POINTER(ct.c_ssize_t)),
+        ("suboffsets", ct.POINTER(ct.c_ssize_t)),
+        ("internal", ct.c_void_p)
+    ]
+
+# Exposes the memory of any object supporting the buffer protocol, writable or not, without copying it
+_PyObject_GetBuffer = ct.pythonapi.PyObject_GetBuffer
+_PyObject_GetBuffer.argtypes = [ct.py_object, ct.POINTER(_Py_buffer), ct.c_int]
+_PyObject_GetBuffer.restype = ct.c_int
+_PyBuffer_Release = ct.pythonapi.PyBuffer_Release
+_PyBuffer_Release.argtypes = [ct.POINTER(_Py_buffer)]
+_PyBuffer_Release.restype = None
+_PyBUF_SIMPLE = 0
+
+class _InputBuffer:
+    """Passes an input buffer to the library without copying it.
+
+    Accepts bytes, bytearray, memoryview, mmap or any other object supporting the buffer protocol. The buffer is held, so for example an mmap cannot be closed, until the block exits. Only non-contiguous buffers are copied.
+    """
+
+    def __init__(self, inputFileBuffer):
+        self.inputFileBuffer = inputFileBuffer
+        self.view = None
+
+    def __enter__(self):
+        """:return: The address and length of the buffer's memory.
+        :rtype: (ct.c_void_p, ct.c_size_t)
+        """
+
+        inputFileBuffer = self.inputFileBuffer
+
+        # ctypes passes a pointer to the internal storage of bytes objects directly
+        if isinstance(inputFileBuffer, bytes):
+            return ct.c_char_p(inputFileBuffer), ct.c_size_t(len(inputFileBuffer))
+
+        view = _Py_buffer()
+        try:
+            _PyObject_GetBuffer(inputFileBuffer, ct.byref(view), _PyBUF_SIMPLE)
+        except BufferError:
+            # Not contiguous, the engine needs the file as a single block of memory
+            copied = memoryview(inputFileBuffer).tobytes()
+            return ct.c_char_p(copied), ct.c_size_t(len(copied))
+
+        self.view = view
+        return ct.c_void_p(view.buf), ct.c_size_t(view.len)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.view is not None:
+            _PyBuffer_Release(ct.byref(self.view))
+            self.view = None
+
+# The C prototype of every function the wrapper uses, bound once when the library is loaded
+# Name: (argument types, return type)
+_PROTOTYPES = {
+    "GWFileConfigXML": (
+        [
+            ct.c_wchar_p
+        ],
+        ct.c_int
+    ),
+    "GWFileConfigGet": (
+        [
+            ct.POINTER(ct.POINTER(ct.c_wchar)),
+            ct.POINTER(ct.c_size_t)
+        ],
+        ct.c_int
+    ),
+    "GWFileConfigRevertToDefaults": (
+        [],
+        ct.c_int
+    ),
+    "GWGetIdInfo": (
+        [
+            ct.c_uint32,
+            ct.POINTER(ct.c_size_t),
+            ct.POINTER(ct.POINTER(ct.c_char))
+        ],
+        ct.c_int
+    ),
+    "GWGetAllIdInfo": (
+        [
+            ct.POINTER(ct.c_size_t),
+            ct.POINTER(ct.POINTER(ct.c_char))
+        ],
+        ct.c_int
+    ),
+    "GWFileProtectLite": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t)
+        ],
+        ct.c_int
+    ),
+    "GWFileProtect": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t)
+        ],
+        ct.c_int
+    ),
+    "GWFileAnalysisAudit": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t)
+        ],
+        ct.c_int
+    ),
+    "GWFileToFileProtectLite": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.c_wchar_p
+        ],
+        ct.c_int
+    ),
+    "GWFileToFileProtect": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.c_wchar_p
+        ],
+        ct.c_int
+    ),
+    "GWFileToFileAnalysisAudit": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.c_wchar_p
+        ],
+        ct.c_int
+    ),
+    "GWFileToFileAnalysisProtectAndExport": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p
+        ],
+        ct.c_int
+    ),
+    "GWFileToFileProtectAndImport": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p
+        ],
+        ct.c_int
+    ),
+    "GWFileToMemoryProtectAndImport": (
+        [
+            ct.c_wchar_p,
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t)
+        ],
+        ct.c_int
+    ),
+    "GWFileToMemoryAnalysisProtectAndExport": (
+        [
+            ct.c_wchar_p,
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t)
+        ],
+        ct.c_int
+    ),
+    "GWFileProtectLiteAndReport": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t),
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t)
+        ],
+        ct.c_int
+    ),
+    "GWFileProtectAndReport": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t),
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t)
+        ],
+        ct.c_int
+    ),
+    "GWFileToFileProtectLiteAndReport": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.c_wchar_p
+        ],
+        ct.c_int
+    ),
+    "GWFileToFileProtectAndReport": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.c_wchar_p
+        ],
+        ct.c_int
+    ),
+    "GWFileAnalysisAuditAndReport": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t),
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t)
+        ],
+        ct.c_int
+    ),
+    "GWFileToFileAnalysisAuditAndReport": (
+        [
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.c_wchar_p,
+            ct.c_wchar_p
+        ],
+        ct.c_int
+    ),
+    "GWMemoryToMemoryProtect": (
+        [
+            ct.c_void_p,
+            ct.c_size_t,
+            ct.c_wchar_p,
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t)
+        ],
+        ct.c_int
+    ),
+    "GWMemoryToMemoryAnalysisAudit": (
+        [
+            ct.c_void_p,
+            ct.c_size_t,
+            ct.c_wchar_p,
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t)
+        ],
+        ct.c_int
+    ),
+    "GWFileProcessStatus": (
+        [
+            ct.POINTER(ct.c_uint)
+        ],
+        ct.c_int
+    ),
+    "GWDetermineFileTypeFromFile": (
+        [
+            ct.c_wchar_p
+        ],
+        ct.c_int
+    ),
+    "GWDetermineFileTypeFromFileAndReport": (
+        [
+            ct.c_wchar_p,
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t)
+        ],
+        ct.c_int
+    ),
+    "GWDetermineFileTypeFromFileInMem": (
+        [
+            ct.c_void_p,
+            ct.c_size_t
+        ],
+        ct.c_int
+    ),
+    "GWDetermineFileTypeFromFileInMemAndReport": (
+        [
+            ct.c_void_p,
+            ct.c_size_t,
+            ct.POINTER(ct.c_void_p),
+            ct.POINTER(ct.c_size_t)
+        ],
+        ct.c_int
+    ),
+    "GWFileDone": (
+        [],
+        ct.c_int
+    ),
+    "GWFileVersion": (
+        [],
+        ct.POINTER(ct.c_wchar)
+    ),
+    "GWFileProcessMsg": (
+        [],
+        ct.POINTER(ct.c_wchar)
+    ),
+    "GWFileErrorMsg": (
+        [],
+        ct.POINTER(ct.c_wchar)
+    )
+}
 
 class GwStringReturnObj:
     """A result from Glasswall containing a text string."""
@@ -14,7 +334,7 @@ class GwFileTypeEnum:
         pass
 
     enumValue = 0  # type: int
-    fileBuffer = None # type: bytearray or None
+    fileBuffer = None # type: bytearray or GwBufferView or None
 
 class GwStatusReturnObj:
     """A result from Glasswall containing the return status."""
@@ -52,7 +372,7 @@ class GwMemReturnObj:
         pass
 
     returnStatus = 0  # type: int
-    fileBuffer = None  # type: bytearray or None
+    fileBuffer = None  # type: bytearray or GwBufferView or None
 
 
 class GwFileToMemPlusReportReturnObj:
@@ -62,44 +382,191 @@ class GwFileToMemPlusReportReturnObj:
         pass
 
     returnStatus = 0  # type: int
-    fileBuffer = None  # type: bytearray or None
-    reportBuffer = None  # type: bytearray or None
+    fileBuffer = None  # type: bytearray or GwBufferView or None
+    reportBuffer = None  # type: bytearray or GwBufferView or None
+
+class GwBufferView:
+    """A read-only view over an output buffer owned by the Glasswall library, returned in zero-copy mode.
+
+    The view is only valid until the next call made to the same Glasswall instance or GWFileDone, after which it is released. Use copy() to keep the content beyond that.
+    The content is read with len(), indexing and slicing, slices being returned as bytes, so no part of the library's memory is handed out to outlive the view.
+    """
+
+    def __init__(self, view):
+        self._view = view
+
+    def __len__(self):
+        return self._view.nbytes
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._view[index].tobytes()
+        return self._view[index]
+
+    def __bytes__(self):
+        return self._view.tobytes()
+
+    def copy(self):
+        """Copies the content into a buffer owned by the caller.
+
+        :return: The content of the view.
+        :rtype: bytearray
+        """
+
+        return bytearray(self._view)
+
+def config_fingerprint(xmlString):
+    """Returns the fingerprint of an XML content management configuration, the SHA-256 hex digest of its text.
+
+    :param str xmlString: The XML content management configuration.
+    :rtype: str
+    """
+
+    return hashlib.sha256(xmlString.encode("utf-8")).hexdigest()
+
+
+def _missing_function(pathToLib, name):
+    """Returns a stand-in for a function the library does not export, raising when it is called.
+
+    :param str pathToLib: The file path to the Glasswall library.
+    :param str name: The function name.
+    """
+
+    def missing(*args):
+        raise Exception("{0} is not available, {1} does not export it".format(name, pathToLib))
+
+    missing.__name__ = name
+    return missing
+
 
 class Glasswall:
     """A Python API wrapper around the Glasswall library."""
 
     gwLibrary = None
+
+    # Fingerprint of the configuration last applied with GWFileConfigXML, None when the defaults are active
+    configFingerprint = None
+    # Fingerprint of the configuration the library reported through GWFileConfigGet once it was applied
+    _engineConfigFingerprint = None
     
-    def __init__(self, pathToLib):
+    def __init__(self, pathToLib, zeroCopy=False):
         """Constructor for the Glasswall library
 
         :param str pathToLib: The file path to the Glasswall library.
+        :param bool zeroCopy: Return output buffers as GwBufferView objects over the library's memory instead of copying them into bytearrays.
         """
 
         try:
             self.gwLibrary = ct.cdll.LoadLibrary(pathToLib)
         except Exception as e:
-            raise Exception("Failed to load Glasswall library. Exception: {0}".format(e.message))
-        
-    def GWFileConfigXML(self, xmlString):
+            raise Exception("Failed to load Glasswall library. Exception: {0}".format(e))
+
+        # API function declarations. Older builds of the library lack some functions, they
+        # only fail when called
+        self.missingFunctions = []
+        for name, (argtypes, restype) in _PROTOTYPES.items():
+            try:
+                function = getattr(self.gwLibrary, name)
+            except AttributeError:
+                self.missingFunctions.append(name)
+                setattr(self.gwLibrary, name, _missing_function(pathToLib, name))
+                continue
+            function.argtypes = argtypes
+            function.restype = restype
+
+        self.zeroCopy = zeroCopy
+        self._views = []
+
+    def _outputBuffer(self, ct_buffer, ct_size):
+        """Converts an output buffer returned by the library into a bytearray, or a GwBufferView in zero-copy mode.
+
+        :param ct.c_void_p ct_buffer: The pointer to the output buffer.
+        :param ct.c_size_t ct_size: The size of the output buffer.
+        :rtype: bytearray or GwBufferView
+        """
+
+        size = ct_size.value
+
+        if self.zeroCopy:
+            if size == 0 or not ct_buffer.value:
+                view = memoryview(b"")
+            else:
+                view = _PyMemoryView_FromMemory(ct_buffer.value, size, _PyBUF_READ)
+            self._views.append(view)
+            return GwBufferView(view)
+
+        # Copy straight into the bytearray rather than through an intermediate ctypes array
+        fileBuffer = bytearray(size)
+        if size:
+            ct.memmove((ct.c_char * size).from_buffer(fileBuffer), ct_buffer.value, size)
+        return fileBuffer
+
+    def _releaseViews(self):
+        """Releases the views handed out since the previous call, as the library may now reuse or free their memory.
+
+        :raises BufferError: If a view is still exported, e.g. to a memoryview or array made from it. The call is not made until the export is released.
+        """
+
+        exported = []
+        for view in self._views:
+            try:
+                view.release()
+            except BufferError:
+                exported.append(view)
+        self._views = exported
+        if exported:
+            raise BufferError(
+                "A buffer returned in zero-copy mode is still exported, release it or keep a copy() before calling the library again"
+            )
+
+    def _engineConfig(self):
+        """Returns the fingerprint of the configuration the library currently reports, or None if it cannot be retrieved."""
+
+        if "GWFileConfigGet" in self.missingFunctions:
+            return None
+        configResult = self.GWFileConfigGet()
+        if configResult.returnStatus != 1 or configResult.string is None:
+            return None
+        return config_fingerprint(configResult.string)
+
+    def GWFileConfigXML(self, xmlString, force=False):
         """Applies the given XML content management configuration to the Glasswall library.
 
+        The call is skipped when the configuration has the same fingerprint as the one last applied
+        and GWFileConfigGet shows the library still holds it, so applying the same configuration
+        repeatedly only parses it once.
+
         :param str xmlString: The XML content management configuration.
+        :param bool force: Apply the configuration even if it is already active.
         :return: A result indicating the status of the call.
         :rtype: GwStatusReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileConfigXML.argtypes = [ct.c_wchar_p]
+        fingerprint = config_fingerprint(xmlString)
 
         # Return Object
         gwReturn = GwStatusReturnObj()
 
+        if not force and fingerprint == self.configFingerprint:
+            engineFingerprint = self._engineConfig()
+            if engineFingerprint is not None and engineFingerprint == self._engineConfigFingerprint:
+                gwReturn.returnStatus = 1
+                return gwReturn
+
+        self._releaseViews()
+
         # API Call
         gwReturn.returnStatus = self.gwLibrary.GWFileConfigXML(
             ct.c_wchar_p(xmlString)
         )
 
+        if gwReturn.returnStatus == 1:
+            self.configFingerprint = fingerprint
+            self._engineConfigFingerprint = self._engineConfig()
+        else:
+            self.configFingerprint = None
+            self._engineConfigFingerprint = None
+
         return gwReturn
 
     def GWFileConfigGet(self):
@@ -109,11 +576,7 @@ class Glasswall:
         :rtype: GwConfigReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileConfigGet.argtypes = [
-            ct.POINTER(ct.POINTER(ct.c_wchar)),
-            ct.POINTER(ct.c_size_t)
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_configurationBuffer = ct.POINTER(ct.c_wchar)()
@@ -140,12 +603,17 @@ class Glasswall:
         :rtype: GwStatusReturnObj
         """
 
+        self._releaseViews()
+
         # Return Object
         gwReturn = GwStatusReturnObj()
 
         # API Call
         gwReturn.returnStatus = self.gwLibrary.GWFileConfigRevertToDefaults()
 
+        self.configFingerprint = None
+        self._engineConfigFingerprint = None
+
         return gwReturn
 
     def GWGetIdInfo(self, issueId):
@@ -156,12 +624,7 @@ class Glasswall:
         :rtype: GwConfigReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWGetIdInfo.argtypes = [
-            ct.c_uint32,
-            ct.POINTER(ct.c_size_t),
-            ct.POINTER(ct.POINTER(ct.c_char)),
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_issueId = ct.c_uint32(issueId)
@@ -191,11 +654,7 @@ class Glasswall:
         :rtype: GwConfigReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWGetAllIdInfo.argtypes = [
-            ct.POINTER(ct.c_size_t),
-            ct.POINTER(ct.POINTER(ct.c_char))
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_size = ct.c_size_t(0)
@@ -224,13 +683,7 @@ class Glasswall:
         :return: A result indicating the file process status along with the protected file.
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileProtectLite.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t)
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_filePath = ct.c_wchar_p(inputFilePath)
@@ -249,10 +702,8 @@ class Glasswall:
             ct.byref(ct_size)
         )
 
-        # Convert outputBuffer to python bytearray
-        fileBuffer = (ct.c_byte * ct_size.value)()
-        ct.memmove(fileBuffer, ct_fileBuffer.value, ct_size.value)
-        gwReturn.fileBuffer = bytearray(fileBuffer)
+        # Convert outputBuffer to python bytearray, or a view over it in zero-copy mode
+        gwReturn.fileBuffer = self._outputBuffer(ct_fileBuffer, ct_size)
 
         return gwReturn
 
@@ -265,13 +716,7 @@ class Glasswall:
         :rtype: GwMemReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileProtect.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t)
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_filePath = ct.c_wchar_p(inputFilePath)
@@ -290,10 +735,8 @@ class Glasswall:
             ct.byref(ct_size)
         )
 
-        # Convert outputBuffer to python bytearray
-        fileBuffer = (ct.c_byte * ct_size.value)()
-        ct.memmove(fileBuffer, ct_fileBuffer.value, ct_size.value)
-        gwReturn.fileBuffer = bytearray(fileBuffer)
+        # Convert outputBuffer to python bytearray, or a view over it in zero-copy mode
+        gwReturn.fileBuffer = self._outputBuffer(ct_fileBuffer, ct_size)
 
         return gwReturn
 
@@ -306,13 +749,7 @@ class Glasswall:
         :rtype: GwMemReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileAnalysisAudit.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t)
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_filePath = ct.c_wchar_p(inputFilePath)
@@ -331,10 +768,8 @@ class Glasswall:
             ct.byref(ct_size)
         )
 
-        # Convert outputBuffer to python bytearray
-        fileBuffer = (ct.c_byte * ct_size.value)()
-        ct.memmove(fileBuffer, ct_analysisFileBuffer.value, ct_size.value)
-        gwReturn.fileBuffer = bytearray(fileBuffer)
+        # Convert outputBuffer to python bytearray, or a view over it in zero-copy mode
+        gwReturn.fileBuffer = self._outputBuffer(ct_analysisFileBuffer, ct_size)
 
         return gwReturn
 
@@ -348,12 +783,7 @@ class Glasswall:
         :rtype: GwStatusReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileToFileProtectLite.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.c_wchar_p
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_inputFilePath = ct.c_wchar_p(inputFilePath)
@@ -382,12 +812,7 @@ class Glasswall:
         :rtype: GwStatusReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileToFileProtect.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.c_wchar_p
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_inputFilePath = ct.c_wchar_p(inputFilePath)
@@ -416,12 +841,7 @@ class Glasswall:
         :rtype: GwStatusReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileToFileAnalysisAudit.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.c_wchar_p
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_inputFilePath = ct.c_wchar_p(inputFilePath)
@@ -449,11 +869,7 @@ class Glasswall:
         :rtype: GwStatusReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileToFileAnalysisProtectAndExport.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_inputFilePath = ct.c_wchar_p(inputFilePath)
@@ -479,10 +895,7 @@ class Glasswall:
         :rtype: GwStatusReturnObj
         """
 
-        self.gwLibrary.GWFileToFileProtectAndImport.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_inputFilePath = ct.c_wchar_p(inputFilePath)
@@ -507,12 +920,7 @@ class Glasswall:
         :rtype: GwMemReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileToMemoryProtectAndImport.argtypes = [
-            ct.c_wchar_p,
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t)
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_filePath = ct.c_wchar_p(inputFilePath)
@@ -529,10 +937,8 @@ class Glasswall:
             ct.byref(ct_size)
         )
 
-        # Convert outputBuffer to python bytearray
-        fileBuffer = (ct.c_byte * ct_size.value)()
-        ct.memmove(fileBuffer, ct_outputFileBuffer.value, ct_size.value)
-        gwReturn.fileBuffer = bytearray(fileBuffer)
+        # Convert outputBuffer to python bytearray, or a view over it in zero-copy mode
+        gwReturn.fileBuffer = self._outputBuffer(ct_outputFileBuffer, ct_size)
 
         return gwReturn
 
@@ -544,12 +950,7 @@ class Glasswall:
         :rtype: GwMemReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileToMemoryAnalysisProtectAndExport.argtypes = [
-            ct.c_wchar_p,
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t)
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_filePath = ct.c_wchar_p(inputFilePath)
@@ -566,10 +967,8 @@ class Glasswall:
             ct.byref(ct_size)
         )
 
-        # Convert outputBuffer to python bytearray
-        fileBuffer = (ct.c_byte * ct_size.value)()
-        ct.memmove(fileBuffer, ct_outputFileBuffer.value, ct_size.value)
-        gwReturn.fileBuffer = bytearray(fileBuffer)
+        # Convert outputBuffer to python bytearray, or a view over it in zero-copy mode
+        gwReturn.fileBuffer = self._outputBuffer(ct_outputFileBuffer, ct_size)
 
         return gwReturn
 
@@ -582,15 +981,7 @@ class Glasswall:
         :rtype: GwFileToMemPlusReportReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileProtectLiteAndReport.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t),
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t)
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_filePath = ct.c_wchar_p(inputFilePath)
@@ -615,14 +1006,10 @@ class Glasswall:
             ct.byref(ct_reportBufferSize)
         )
 
-        # Convert outputBuffer to python bytearray
-        fileBuffer = (ct.c_byte * ct_fileBufferSize.value)()
-        ct.memmove(fileBuffer, ct_outputFileBuffer.value, ct_fileBufferSize.value)
-        gwReturn.fileBuffer = bytearray(fileBuffer)
+        # Convert outputBuffer to python bytearray, or a view over it in zero-copy mode
+        gwReturn.fileBuffer = self._outputBuffer(ct_outputFileBuffer, ct_fileBufferSize)
 
-        reportBuffer = (ct.c_byte * ct_reportBufferSize.value)()
-        ct.memmove(reportBuffer, ct_outputReportBuffer.value, ct_reportBufferSize.value)
-        gwReturn.reportBuffer = bytearray(reportBuffer)
+        gwReturn.reportBuffer = self._outputBuffer(ct_outputReportBuffer, ct_reportBufferSize)
 
         return gwReturn
 
@@ -635,15 +1022,7 @@ class Glasswall:
         :rtype: GwFileToMemPlusReportReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileProtectAndReport.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t),
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t)
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_filePath = ct.c_wchar_p(inputFilePath)
@@ -668,14 +1047,10 @@ class Glasswall:
             ct.byref(ct_reportBufferSize)
         )
 
-        # Convert outputBuffer to python bytearray
-        fileBuffer = (ct.c_byte * ct_fileBufferSize.value)()
-        ct.memmove(fileBuffer, ct_outputFileBuffer.value, ct_fileBufferSize.value)
-        gwReturn.fileBuffer = bytearray(fileBuffer)
+        # Convert outputBuffer to python bytearray, or a view over it in zero-copy mode
+        gwReturn.fileBuffer = self._outputBuffer(ct_outputFileBuffer, ct_fileBufferSize)
 
-        reportBuffer = (ct.c_byte * ct_reportBufferSize.value)()
-        ct.memmove(reportBuffer, ct_outputReportBuffer.value, ct_reportBufferSize.value)
-        gwReturn.reportBuffer = bytearray(reportBuffer)
+        gwReturn.reportBuffer = self._outputBuffer(ct_outputReportBuffer, ct_reportBufferSize)
 
         return gwReturn
 
@@ -690,13 +1065,7 @@ class Glasswall:
         :rtype: GwStatusReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileToFileProtectLiteAndReport.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.c_wchar_p
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_inputFilePath = ct.c_wchar_p(inputFilePath)
@@ -729,13 +1098,7 @@ class Glasswall:
         :rtype: GwStatusReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileToFileProtectAndReport.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.c_wchar_p
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_inputFilePath = ct.c_wchar_p(inputFilePath)
@@ -765,15 +1128,7 @@ class Glasswall:
         :rtype: GwFileToMemPlusReportReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileAnalysisAuditAndReport.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t),
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t)
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_filePath = ct.c_wchar_p(inputFilePath)
@@ -798,14 +1153,10 @@ class Glasswall:
             ct.byref(ct_reportBufferSize)
         )
 
-        # Convert outputBuffer to python bytearray
-        fileBuffer = (ct.c_byte * ct_fileBufferSize.value)()
-        ct.memmove(fileBuffer, ct_outputFileBuffer.value, ct_fileBufferSize.value)
-        gwReturn.fileBuffer = bytearray(fileBuffer)
+        # Convert outputBuffer to python bytearray, or a view over it in zero-copy mode
+        gwReturn.fileBuffer = self._outputBuffer(ct_outputFileBuffer, ct_fileBufferSize)
 
-        reportBuffer = (ct.c_byte * ct_reportBufferSize.value)()
-        ct.memmove(reportBuffer, ct_outputReportBuffer.value, ct_reportBufferSize.value)
-        gwReturn.reportBuffer = bytearray(reportBuffer)
+        gwReturn.reportBuffer = self._outputBuffer(ct_outputReportBuffer, ct_reportBufferSize)
 
         return gwReturn
 
@@ -820,13 +1171,7 @@ class Glasswall:
         :rtype: GwStatusReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileToFileAnalysisAuditAndReport.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.c_wchar_p
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_inputFilePath = ct.c_wchar_p(inputFilePath)
@@ -850,84 +1195,64 @@ class Glasswall:
     def GWMemoryToMemoryProtect(self, inputFileBuffer, fileType):
         """Protects the file in Memory to Memory Protect mode. The file buffer will be None if the file is non-conforming.
 
-        :param bytearray inputFileBuffer: The buffer containing the file to be processed.
+        :param inputFileBuffer: The buffer containing the file to be processed, any object supporting the buffer protocol such as bytes, bytearray, memoryview or mmap.
         :param str fileType: The file type of the file to be processed.
         :return: A result indicating the file process status along with the protected file.
         :rtype: GwMemReturnObj
         """
 
-        self.gwLibrary.GWMemoryToMemoryProtect.argtypes = [
-            ct.c_void_p,
-            ct.c_size_t,
-            ct.c_wchar_p,
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t)
-        ]
+        self._releaseViews()
 
         # Variable initialization
-        byteArrayBuffer     = bytearray(inputFileBuffer)
-        ct_buffer           = (ct.c_ubyte * len(byteArrayBuffer)).from_buffer(byteArrayBuffer)
-        ct_length           = ct.c_size_t(len(inputFileBuffer))
         ct_fileType         = ct.c_wchar_p(fileType)
         ct_outputFileBuffer = ct.c_void_p(0)
         ct_fileBufferSize   = ct.c_size_t(0)
 
         gwReturn = GwMemReturnObj()
 
-        gwReturn.returnStatus = self.gwLibrary.GWMemoryToMemoryProtect(
-            ct.byref(ct_buffer),
-            ct_length,
-            ct_fileType,
-            ct.byref(ct_outputFileBuffer),
-            ct.byref(ct_fileBufferSize)
-        )
+        with _InputBuffer(inputFileBuffer) as (ct_buffer, ct_length):
+            gwReturn.returnStatus = self.gwLibrary.GWMemoryToMemoryProtect(
+                ct_buffer,
+                ct_length,
+                ct_fileType,
+                ct.byref(ct_outputFileBuffer),
+                ct.byref(ct_fileBufferSize)
+            )
 
-        # Convert outputBuffer to python bytearray
-        fileBuffer = (ct.c_byte * ct_fileBufferSize.value)()
-        ct.memmove(fileBuffer, ct_outputFileBuffer.value, ct_fileBufferSize.value)
-        gwReturn.fileBuffer = bytearray(fileBuffer)
+        # Convert outputBuffer to python bytearray, or a view over it in zero-copy mode
+        gwReturn.fileBuffer = self._outputBuffer(ct_outputFileBuffer, ct_fileBufferSize)
 
         return gwReturn
 
     def GWMemoryToMemoryAnalysisAudit(self, inputFileBuffer, fileType):
         """Analyses the file in Memory to Memory analysis mode.
 
-        :param bytearray inputFileBuffer: The buffer containing the file to be analysed.
+        :param inputFileBuffer: The buffer containing the file to be analysed, any object supporting the buffer protocol such as bytes, bytearray, memoryview or mmap.
         :param str fileType: The file type of the file to be analysed.
         :return: A result indicating the file process status along with the XML analysis report.
         :rtype: GwMemReturnObj
         """
 
-        self.gwLibrary.GWMemoryToMemoryAnalysisAudit.argtypes = [
-            ct.c_void_p,
-            ct.c_size_t,
-            ct.c_wchar_p,
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t)
-        ]
+        self._releaseViews()
 
         # Variable initialization
-        byteArrayBuffer         = bytearray(inputFileBuffer)
-        ct_buffer               = (ct.c_ubyte * len(byteArrayBuffer)).from_buffer(byteArrayBuffer)
-        ct_length               = ct.c_size_t(len(inputFileBuffer))
         ct_fileType             = ct.c_wchar_p(fileType)
         ct_analysisOutputBuffer = ct.c_void_p(0)
         ct_analysisBufferSize   = ct.c_size_t(0)
 
         gwReturn = GwMemReturnObj()
 
-        gwReturn.returnStatus = self.gwLibrary.GWMemoryToMemoryAnalysisAudit(
-            ct.byref(ct_buffer),
-            ct_length,
-            ct_fileType,
-            ct.byref(ct_analysisOutputBuffer),
-            ct.byref(ct_analysisBufferSize)
-        )
+        with _InputBuffer(inputFileBuffer) as (ct_buffer, ct_length):
+            gwReturn.returnStatus = self.gwLibrary.GWMemoryToMemoryAnalysisAudit(
+                ct_buffer,
+                ct_length,
+                ct_fileType,
+                ct.byref(ct_analysisOutputBuffer),
+                ct.byref(ct_analysisBufferSize)
+            )
 
-        # Convert outputBuffer to python bytearray
-        fileBuffer = (ct.c_byte * ct_analysisBufferSize.value)()
-        ct.memmove(fileBuffer, ct_analysisOutputBuffer.value, ct_analysisBufferSize.value)
-        gwReturn.fileBuffer = bytearray(fileBuffer)
+        # Convert outputBuffer to python bytearray, or a view over it in zero-copy mode
+        gwReturn.fileBuffer = self._outputBuffer(ct_analysisOutputBuffer, ct_analysisBufferSize)
 
         return gwReturn
 
@@ -938,9 +1263,6 @@ class Glasswall:
         :rtype: GwProcessStatusReturnObj
         """
 
-        # API function declaration
-        self.gwLibrary.GWFileProcessStatus.argtypes = [ct.POINTER(ct.c_uint)]
-
         # Variable initialisation
         ct_glasswallProcessStatus = ct.c_uint(0)
 
@@ -961,8 +1283,7 @@ class Glasswall:
         :rtype: GwFileTypeEnum
         """
 
-        # API function declaration
-        self.gwLibrary.GWDetermineFileTypeFromFile.argtypes = [ct.c_wchar_p]
+        self._releaseViews()
 
         # Variable initialisation
         ct_filePath = ct.c_wchar_p(filePath)
@@ -983,12 +1304,7 @@ class Glasswall:
         :rtype: GwFileTypeEnum
         """
 
-        # API function declaration
-        self.gwLibrary.GWDetermineFileTypeFromFileAndReport.argtypes = [
-            ct.c_wchar_p, 
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t)
-        ]
+        self._releaseViews()
 
         # Variable initialisation
         ct_filePath                 = ct.c_wchar_p(filePath)
@@ -1001,62 +1317,41 @@ class Glasswall:
         # API Call
         gwReturn.enumValue = self.gwLibrary.GWDetermineFileTypeFromFileAndReport(ct_filePath, ct.byref(ct_analysisFileBuffer), ct.byref(ct_analysisFileBufferLength))
 
-        # Convert outputBuffer to python bytearray
-        fileBuffer = (ct.c_byte * ct_analysisFileBufferLength.value)()
-        ct.memmove(fileBuffer, ct_analysisFileBuffer.value, ct_analysisFileBufferLength.value)
-        gwReturn.fileBuffer = bytearray(fileBuffer)
+        # Convert outputBuffer to python bytearray, or a view over it in zero-copy mode
+        gwReturn.fileBuffer = self._outputBuffer(ct_analysisFileBuffer, ct_analysisFileBufferLength)
 
         return gwReturn
 
     def GWDetermineFileTypeFromFileInMem(self, inputFileBuffer):
         """Returns a value indicating the file type determined by Glasswall.
 
-        :param bytearray inputFileBuffer: The input buffer containing the file to be determined.
+        :param inputFileBuffer: The input buffer containing the file to be determined, any object supporting the buffer protocol such as bytes, bytearray, memoryview or mmap.
         :return: A result indicating the determined file type.
         :rtype: GwFileTypeEnum
         """
 
-        # API function declaration
-        self.gwLibrary.GWDetermineFileTypeFromFileInMem.argtypes = [
-            ct.c_void_p,
-            ct.c_size_t
-        ]
-
-        # Variable initialisation
-
-        byteArrayBuffer             = bytearray(inputFileBuffer)
-        ct_inputFileBuffer          = (ct.c_ubyte * len(byteArrayBuffer)).from_buffer(byteArrayBuffer)
-        ct_inputFileBufferLength    = ct.c_size_t(len(byteArrayBuffer))
+        self._releaseViews()
 
         # Return Object
         gwReturn = GwFileTypeEnum()
 
         # API Call
-        gwReturn.enumValue = self.gwLibrary.GWDetermineFileTypeFromFileInMem(ct.byref(ct_inputFileBuffer), ct_inputFileBufferLength)
+        with _InputBuffer(inputFileBuffer) as (ct_inputFileBuffer, ct_inputFileBufferLength):
+            gwReturn.enumValue = self.gwLibrary.GWDetermineFileTypeFromFileInMem(ct_inputFileBuffer, ct_inputFileBufferLength)
 
         return gwReturn
 
     def GWDetermineFileTypeFromFileInMemAndReport(self, inputFileBuffer):
         """Returns a value indicating the file type determined by Glasswall along with an XML analysis report.
 
-        :param bytearray inputFileBuffer: The input buffer containing the file to be determined.
+        :param inputFileBuffer: The input buffer containing the file to be determined, any object supporting the buffer protocol such as bytes, bytearray, memoryview or mmap.
         :return: A result indicating the determined file type along with an XML analysis report.
         :rtype: GwFileTypeEnum
         """
 
-        # API function declaration
-        self.gwLibrary.GWDetermineFileTypeFromFileInMemAndReport.argtypes = [
-            ct.c_void_p,
-            ct.c_size_t,
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t)
-        ]
+        self._releaseViews()
 
         # Variable initialisation
-
-        byteArrayBuffer             = bytearray(inputFileBuffer)
-        ct_inputFileBuffer          = (ct.c_ubyte * len(byteArrayBuffer)).from_buffer(byteArrayBuffer)
-        ct_inputFileBufferLength    = ct.c_size_t(len(byteArrayBuffer))
         ct_analysisFileBuffer       = ct.c_void_p(0)
         ct_analysisFileBufferLength = ct.c_size_t(0)
 
@@ -1064,12 +1359,11 @@ class Glasswall:
         gwReturn = GwFileTypeEnum()
 
         # API Call
-        gwReturn.enumValue = self.gwLibrary.GWDetermineFileTypeFromFileInMemAndReport(ct.byref(ct_inputFileBuffer), ct_inputFileBufferLength, ct.byref(ct_analysisFileBuffer), ct.byref(ct_analysisFileBufferLength))
+        with _InputBuffer(inputFileBuffer) as (ct_inputFileBuffer, ct_inputFileBufferLength):
+            gwReturn.enumValue = self.gwLibrary.GWDetermineFileTypeFromFileInMemAndReport(ct_inputFileBuffer, ct_inputFileBufferLength, ct.byref(ct_analysisFileBuffer), ct.byref(ct_analysisFileBufferLength))
 
-        # Convert outputBuffer to python bytearray
-        fileBuffer = (ct.c_byte * ct_analysisFileBufferLength.value)()
-        ct.memmove(fileBuffer, ct_analysisFileBuffer.value, ct_analysisFileBufferLength.value)
-        gwReturn.fileBuffer = bytearray(fileBuffer)
+        # Convert outputBuffer to python bytearray, or a view over it in zero-copy mode
+        gwReturn.fileBuffer = self._outputBuffer(ct_analysisFileBuffer, ct_analysisFileBufferLength)
 
         return gwReturn
 
@@ -1080,6 +1374,8 @@ class Glasswall:
         :rtype: GwStatusReturnObj
         """
 
+        self._releaseViews()
+
         # Return Object
         gwReturn = GwStatusReturnObj()
 
@@ -1095,9 +1391,6 @@ class Glasswall:
         :rtype: GwStringReturnObj
         """
 
-        # Declare the return type
-        self.gwLibrary.GWFileVersion.restype = ct.POINTER(ct.c_wchar)
-
         # Return Object
         gwReturn = GwStringReturnObj()
 
@@ -1115,9 +1408,6 @@ class Glasswall:
         :rtype: GwStringReturnObj
         """
 
-        # Declare the return type
-        self.gwLibrary.GWFileProcessMsg.restype = ct.POINTER(ct.c_wchar)
-
         # Return Object
         gwReturn = GwStringReturnObj()
 
@@ -1135,9 +1425,6 @@ class Glasswall:
         :rtype: GwStringReturnObj
         """
 
-        # Declare the return type
-        self.gwLibrary.GWFileErrorMsg.restype = ct.POINTER(ct.c_wchar)
-
         # Return Object
         gwReturn = GwStringReturnObj()
 
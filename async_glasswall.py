@@ -0,0 +1,318 @@
+import signal
+import asyncio
+import functools
+import multiprocessing
+import concurrent.futures
+
+from Glasswall import Glasswall
+from run_log import log
+
+
+class AsyncGlasswallError(Exception):
+    """Raised when a Glasswall worker fails to start, or exits during a call."""
+
+
+def _worker_main(conn, libraryPath, configXml, requiredFunctions=()):
+    """Entry point of an AsyncGlasswall worker process.
+
+    Loads the library and applies the configuration, then runs the calls received on the
+    connection until it receives None or the connection is closed. The library functions
+    it lacks are sent with its ready message.
+    """
+
+    # Handlers installed by the parent's event loop are inherited by the fork, the worker is
+    # stopped by its parent and must remain killable
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.set_wakeup_fd(-1)
+
+    try:
+        gw = Glasswall(libraryPath)
+        missing = [name for name in requiredFunctions if name in gw.missingFunctions]
+        if missing:
+            raise AsyncGlasswallError("{0} does not export {1}".format(libraryPath, ", ".join(missing)))
+        if configXml is not None and gw.GWFileConfigXML(configXml).returnStatus != 1:
+            raise AsyncGlasswallError(
+                "Failed to apply the content management configuration for the following reason: "
+                + gw.GWFileErrorMsg().text
+            )
+    except Exception as e:
+        conn.send((False, str(e)))
+        return
+
+    conn.send((True, gw.missingFunctions))
+
+    while True:
+        try:
+            item = conn.recv()
+        except EOFError:
+            break
+        if item is None:
+            break
+        name, args = item
+        try:
+            # A function is given the worker's library, so it can make several calls in one worker
+            target = getattr(gw, name) if isinstance(name, str) else functools.partial(name, gw)
+            reply = (True, target(*args))
+        except Exception as e:
+            reply = (False, "{0}: {1}".format(type(e).__name__, e))
+        conn.send(reply)
+
+
+class _Worker:
+    """A process holding its own Glasswall library, driven over a pipe."""
+
+    def __init__(self, libraryPath, configXml, requiredFunctions=()):
+        self.conn, childConn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_worker_main, args=(childConn, libraryPath, configXml, requiredFunctions),
+                                               daemon=True)
+        self.process.start()
+        childConn.close()
+
+    def _receive(self):
+        try:
+            ok, payload = self.conn.recv()
+        except (EOFError, OSError):
+            raise AsyncGlasswallError("Glasswall worker exited unexpectedly with code {0}".format(self.process.exitcode))
+        if not ok:
+            raise AsyncGlasswallError(payload)
+        return payload
+
+    def wait_ready(self):
+        """Blocks until the worker has loaded the library.
+
+        :return: The names of the functions the library does not export.
+        :rtype: list
+        """
+
+        return self._receive()
+
+    def call(self, name, args):
+        """Runs a wrapper method in the worker and blocks until it returns."""
+
+        self.conn.send((name, args))
+        return self._receive()
+
+    def kill(self):
+        # The connection is left open, a thread may still be waiting on it and now sees it end
+        self.process.terminate()
+        self.process.join()
+
+    def close(self):
+        # Later workers inherit this end of the pipe, so closing it alone does not end the worker
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+
+
+def _picklable(arg):
+    """Input buffers that cannot be sent to a worker, such as memoryviews and mmaps, are copied to bytes."""
+
+    if isinstance(arg, (str, bytes, bytearray, int, float, type(None), dict, list, tuple)):
+        return arg
+    return memoryview(arg).tobytes()
+
+
+class AsyncGlasswall:
+    """Runs Glasswall wrapper calls in worker processes without blocking the event loop.
+
+    Any Glasswall method can be awaited on this object, e.g.
+    ``await agw.GWMemoryToMemoryProtect(buffer, "pdf")``, or through call() to give it a
+    timeout. At most maxInFlight calls are admitted at once, further callers wait for a
+    slot, so producers are slowed to the rate the workers complete calls. A call that
+    runs past its timeout has its worker killed and replaced, and raises
+    asyncio.TimeoutError. Should the replacement of the last worker fail, waiting and later
+    calls raise AsyncGlasswallError.
+
+    Results are those of the Glasswall methods, with output buffers as bytearrays.
+    """
+
+    def __init__(self, libraryPath, configXml=None, workers=1, maxInFlight=None, timeout=None, requiredFunctions=()):
+        """Constructor for the asynchronous wrapper. Call start() or use ``async with`` before calling.
+
+        :param str libraryPath: The file path to the Glasswall library.
+        :param str configXml: An optional XML content management configuration applied in every worker.
+        :param int workers: The number of worker processes, the most calls run at the same time.
+        :param int maxInFlight: The most calls admitted at once, running or waiting for a worker,
+            defaults to twice the number of workers.
+        :param float timeout: The default seconds a call may take, None for no limit.
+        :param iterable requiredFunctions: Library functions the workers fail to start without.
+            Other missing functions are logged when the workers start and raise when called.
+        """
+
+        self.libraryPath = libraryPath
+        self.configXml = configXml
+        self.workers = workers
+        self.maxInFlight = maxInFlight or 2 * workers
+        self.timeout = timeout
+        self.requiredFunctions = tuple(requiredFunctions)
+        # Functions the library does not export, known once a worker has started
+        self.missingFunctions = None
+
+        self._slots = None
+        self._idle = None
+        self._all = []
+        self._io = None
+        # Tasks starting replacement workers, referenced until done so they are not collected
+        self._replacing = set()
+        # Why no worker is left, once the last replacement failed
+        self._broken = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def __getattr__(self, name):
+        if not name.startswith("GW"):
+            raise AttributeError(name)
+
+        async def method(*args):
+            return await self.call(name, *args)
+
+        method.__name__ = name
+        return method
+
+    async def start(self):
+        """Starts the workers and waits for each to load the library.
+
+        :raises AsyncGlasswallError: If a worker fails to start.
+        """
+
+        loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.maxInFlight)
+        self._idle = asyncio.Queue()
+        # Each worker blocks one thread while it runs a call, the event loop never blocks. The
+        # extra thread starts replacement workers while the others are busy
+        self._io = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers + 1)
+
+        try:
+            for _ in range(self.workers):
+                await self._add_worker(loop)
+        except Exception:
+            await self.close()
+            raise
+        if self.missingFunctions:
+            log.warning("%s does not export %s, calls to them will fail", self.libraryPath, ", ".join(self.missingFunctions))
+
+    async def _add_worker(self, loop):
+        worker = _Worker(self.libraryPath, self.configXml, self.requiredFunctions)
+        self._all.append(worker)
+        try:
+            self.missingFunctions = await loop.run_in_executor(self._io, worker.wait_ready)
+        except Exception:
+            self._all.remove(worker)
+            worker.kill()
+            raise
+        self._idle.put_nowait(worker)
+
+    async def call(self, name, *args, timeout=None):
+        """Runs a Glasswall method in a worker.
+
+        :param name: The method name, e.g. "GWFileProtect", or a module level function, which is
+            called with the worker's Glasswall instance followed by args.
+        :param args: The method arguments.
+        :param float timeout: Seconds the call may take once it has a worker, defaults to the
+            timeout given to the constructor.
+        :return: The result of the method.
+        :raises asyncio.TimeoutError: If the call took longer than its timeout.
+        :raises AsyncGlasswallError: If the method raised, the worker died, or no worker is left.
+        """
+
+        loop = asyncio.get_running_loop()
+        args = tuple(_picklable(arg) for arg in args)
+        timeout = self.timeout if timeout is None else timeout
+
+        async with self._slots:
+            worker = await self._idle.get()
+            if worker is None:
+                # Passed on, so every waiting caller wakes
+                self._idle.put_nowait(None)
+                raise AsyncGlasswallError(self._broken)
+            try:
+                result = await asyncio.wait_for(loop.run_in_executor(self._io, worker.call, name, args), timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                # The worker may still be running the call, it cannot take another
+                self._replace(worker, loop)
+                raise
+            except AsyncGlasswallError:
+                if not worker.process.is_alive():
+                    self._replace(worker, loop)
+                else:
+                    self._idle.put_nowait(worker)
+                raise
+            self._idle.put_nowait(worker)
+            return result
+
+    def _replace(self, worker, loop):
+        """Kills a worker stuck in or broken by a call, and starts another in its place."""
+
+        worker.kill()
+        self._all.remove(worker)
+        task = loop.create_task(self._add_worker(loop))
+        self._replacing.add(task)
+        task.add_done_callback(self._replaced)
+
+    def _replaced(self, task):
+        self._replacing.discard(task)
+        if task.cancelled() or task.exception() is None:
+            return
+        log.error("Failed to replace a Glasswall worker: %s", task.exception())
+        if not self._all and not self._replacing:
+            self._broken = "No Glasswall worker is left, the last replacement failed: {0}".format(task.exception())
+            self._idle.put_nowait(None)
+
+    async def map_unordered(self, name, argsIterable, timeout=None):
+        """Runs a Glasswall method over many argument tuples, yielding results as they complete.
+
+        Arguments are taken from the iterable only as slots become free, so it may be a
+        generator producing them lazily.
+
+        :param str name: The method name, e.g. "GWMemoryToMemoryProtect".
+        :param iterable argsIterable: A tuple of arguments per call.
+        :param float timeout: Seconds each call may take, see call().
+        :return: An async generator of (args, result, error) tuples, where error is the
+            exception raised by the call, or None.
+        """
+
+        async def run(args):
+            try:
+                return args, await self.call(name, *args, timeout=timeout), None
+            except (asyncio.TimeoutError, AsyncGlasswallError) as e:
+                return args, None, e
+
+        pending = set()
+        for args in argsIterable:
+            if len(pending) >= self.maxInFlight:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+            pending.add(asyncio.ensure_future(run(args)))
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+
+    async def close(self):
+        """Stops the workers."""
+
+        loop = asyncio.get_running_loop()
+        replacing, self._replacing = self._replacing, set()
+        for task in replacing:
+            task.cancel()
+        if replacing:
+            await asyncio.gather(*replacing, return_exceptions=True)
+        workers, self._all = self._all, []
+        for worker in workers:
+            await loop.run_in_executor(None, worker.close)
+        if self._io is not None:
+            self._io.shutdown(wait=False)
+            self._io = None
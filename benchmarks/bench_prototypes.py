@@ -0,0 +1,82 @@
+"""Measures the per-call overhead of the Glasswall wrapper with prototypes bound once at load
+time, against re-declaring them on every call as the wrapper used to.
+
+Runs against the stub library so only wrapper overhead is measured:
+
+    python benchmarks/bench_prototypes.py [--calls N]
+"""
+
+import os
+import sys
+import timeit
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import Glasswall as gwModule
+from Glasswall import Glasswall
+from stub_library import build_stub_library
+
+
+class PerCallGlasswall(Glasswall):
+    """The wrapper as it behaved before prototypes were bound at load time."""
+
+    def _declare(self, name):
+        argtypes, restype = gwModule._PROTOTYPES[name]
+        function = getattr(self.gwLibrary, name)
+        function.argtypes = argtypes
+        function.restype = restype
+
+    def GWFileProtect(self, inputFilePath, fileType):
+        self._declare("GWFileProtect")
+        return Glasswall.GWFileProtect(self, inputFilePath, fileType)
+
+    def GWMemoryToMemoryProtect(self, inputFileBuffer, fileType):
+        self._declare("GWMemoryToMemoryProtect")
+        return Glasswall.GWMemoryToMemoryProtect(self, inputFileBuffer, fileType)
+
+    def GWFileProcessStatus(self):
+        self._declare("GWFileProcessStatus")
+        return Glasswall.GWFileProcessStatus(self)
+
+    def GWFileVersion(self):
+        self._declare("GWFileVersion")
+        return Glasswall.GWFileVersion(self)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100000, help="Calls per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements per API, the best is reported")
+    args = parser.parse_args()
+
+    workDir = tempfile.mkdtemp()
+    libraryPath = build_stub_library(workDir)
+
+    inputPath = os.path.join(workDir, "input.png")
+    with open(inputPath, "wb") as f:
+        f.write(b"\x89PNG" + b"\0" * 60)
+    inputBuffer = bytearray(64)
+
+    calls = {
+        "GWFileProtect": lambda gw: gw.GWFileProtect(inputPath, "png"),
+        "GWMemoryToMemoryProtect": lambda gw: gw.GWMemoryToMemoryProtect(inputBuffer, "png"),
+        "GWFileProcessStatus": lambda gw: gw.GWFileProcessStatus(),
+        "GWFileVersion": lambda gw: gw.GWFileVersion(),
+    }
+    variants = [("per call", PerCallGlasswall(libraryPath)), ("at load", Glasswall(libraryPath))]
+
+    print("{0:<28}{1:>16}{2:>16}{3:>10}".format("API (ns/call)", "per call", "at load", "change"))
+    for name, call in calls.items():
+        timings = []
+        for _, gw in variants:
+            best = min(timeit.repeat(lambda: call(gw), number=args.calls, repeat=args.repeat))
+            timings.append(best / args.calls * 1e9)
+        print("{0:<28}{1:>16.0f}{2:>16.0f}{3:>9.1f}%".format(
+            name, timings[0], timings[1], (timings[1] - timings[0]) / timings[0] * 100
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Measures calls per second and bytes copied per call for each Glasswall wrapper API.
+
+Runs against the stub library, configured to return files of each requested size after an
+optional delay, with output copied into Python (the default) and with zero-copy views:
+
+    python benchmarks/bench_wrapper.py [--output-sizes 0,65536] [--json results.json]
+
+Results saved with --json can be passed back as --baseline on a later run, which then exits
+with status 1 when an API got slower than the baseline by more than --tolerance percent.
+"""
+
+import os
+import sys
+import json
+import time
+import ctypes as ct
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Glasswall import Glasswall
+from stub_library import build_stub_library
+
+MODES = (("copy", False), ("zero-copy", True))
+
+# Result attributes that can hold a buffer returned by the library
+BUFFER_ATTRIBUTES = ("fileBuffer", "reportBuffer")
+
+
+def bytes_copied(gwReturn):
+    """Returns how many bytes of library output the wrapper copied into Python objects.
+
+    :param gwReturn: The object returned by a wrapper method.
+    :rtype: int
+    """
+
+    copied = 0
+    for name in BUFFER_ATTRIBUTES:
+        buffer = getattr(gwReturn, name, None)
+        if isinstance(buffer, (bytes, bytearray)):
+            copied += len(buffer)
+    return copied
+
+
+def configure_stub(gw, outputSize, delayMicroseconds):
+    """Sets the size of the files the stub returns and its delay per processing call."""
+
+    configure = gw.gwLibrary.GWStubConfigure
+    configure.argtypes = [ct.c_longlong, ct.c_uint]
+    configure.restype = ct.c_int
+    configure(outputSize, delayMicroseconds)
+
+
+def measure(call, calls, repeat):
+    """Returns the best calls per second over repeat runs of calls calls."""
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            call()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return calls / best if best else float("inf")
+
+
+def result_key(result):
+    return "{0}[{1},{2}]".format(result["api"], result["mode"], result["outputSize"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000, help="Calls per measurement")
+    parser.add_argument("--repeat", type=int, default=3, help="Measurements per API, the best is reported")
+    parser.add_argument("--input-size", type=int, default=65536, help="Size of the input file in bytes")
+    parser.add_argument("--output-sizes", default="0,4096,1048576",
+                        help="Comma separated sizes of the files returned by the stub, -1 echoes the input")
+    parser.add_argument("--delay-us", type=int, default=0, help="Stub delay per processing call in microseconds")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Compare against results previously written with --json")
+    parser.add_argument("--tolerance", type=float, default=10,
+                        help="Slowdown against the baseline, in percent, reported as a regression")
+    args = parser.parse_args()
+
+    workDir = tempfile.mkdtemp()
+    libraryPath = build_stub_library(workDir)
+
+    inputPath = os.path.join(workDir, "input.png")
+    outputPath = os.path.join(workDir, "output.png")
+    inputBytes = b"\x89PNG" + b"\0" * max(0, args.input_size - 4)
+    with open(inputPath, "wb") as f:
+        f.write(inputBytes)
+    inputBuffer = bytearray(inputBytes)
+    config = "<config/>"
+
+    calls = [
+        ("GWFileProtect", lambda gw: gw.GWFileProtect(inputPath, "png")),
+        ("GWFileProtectAndReport", lambda gw: gw.GWFileProtectAndReport(inputPath, "png")),
+        ("GWFileAnalysisAudit", lambda gw: gw.GWFileAnalysisAudit(inputPath, "png")),
+        ("GWFileToFileProtect", lambda gw: gw.GWFileToFileProtect(inputPath, "png", outputPath)),
+        ("GWMemoryToMemoryProtect(bytes)", lambda gw: gw.GWMemoryToMemoryProtect(inputBytes, "png")),
+        ("GWMemoryToMemoryProtect(bytearray)", lambda gw: gw.GWMemoryToMemoryProtect(inputBuffer, "png")),
+        ("GWMemoryToMemoryAnalysisAudit", lambda gw: gw.GWMemoryToMemoryAnalysisAudit(inputBuffer, "png")),
+        ("GWDetermineFileTypeFromFileInMem", lambda gw: gw.GWDetermineFileTypeFromFileInMem(inputBuffer)),
+        ("GWFileConfigXML", lambda gw: gw.GWFileConfigXML(config)),
+        ("GWFileProcessStatus", lambda gw: gw.GWFileProcessStatus()),
+        ("GWFileVersion", lambda gw: gw.GWFileVersion()),
+    ]
+
+    results = []
+    print("{0:<36}{1:>11}{2:>12}{3:>14}{4:>16}".format("API", "mode", "output", "calls/s", "copied/call"))
+    for outputSize in [int(size) for size in args.output_sizes.split(",")]:
+        for mode, zeroCopy in MODES:
+            gw = Glasswall(libraryPath, zeroCopy=zeroCopy)
+            configure_stub(gw, outputSize, args.delay_us)
+            for name, call in calls:
+                copied = bytes_copied(call(gw))
+                callsPerSecond = measure(lambda: call(gw), args.calls, args.repeat)
+                results.append({
+                    "api": name,
+                    "mode": mode,
+                    "outputSize": outputSize,
+                    "callsPerSecond": callsPerSecond,
+                    "bytesCopiedPerCall": copied
+                })
+                print("{0:<36}{1:>11}{2:>12}{3:>14.0f}{4:>16}".format(name, mode, outputSize, callsPerSecond, copied))
+            gw.GWFileDone()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "calls": args.calls,
+                "inputSize": args.input_size,
+                "delayMicroseconds": args.delay_us,
+                "results": results
+            }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = dict((result_key(result), result) for result in json.load(f)["results"])
+
+        regressions = 0
+        for result in results:
+            previous = baseline.get(result_key(result))
+            if previous is None:
+                continue
+            change = (result["callsPerSecond"] - previous["callsPerSecond"]) / previous["callsPerSecond"] * 100
+            if change < -args.tolerance or result["bytesCopiedPerCall"] > previous["bytesCopiedPerCall"]:
+                regressions += 1
+                print("Regression: {0} {1:.1f}% calls/s, {2} bytes copied/call (baseline {3})".format(
+                    result_key(result), change, result["bytesCopiedPerCall"], previous["bytesCopiedPerCall"]
+                ))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+/*
+ * A stand-in for libglasswall.classic.so used to benchmark the Python wrapper.
+ *
+ * Exports the same symbols as the Glasswall library. Processing functions echo their
+ * input back as the "protected" file and analysis functions return a fixed XML report,
+ * so the time measured is the wrapper's own overhead rather than the engine's.
+ *
+ * GWStubConfigure, which the real library does not have, fixes the size of the files
+ * returned and adds a delay to every processing call to model the engine.
+ */
+
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <wchar.h>
+#include <time.h>
+
+static const char REPORT[] =
+    "<?xml version=\"1.0\" encoding=\"utf-8\"?>"
+    "<gw:GWallInfo xmlns:gw=\"http://glasswall.com/namespace\">"
+    "<gw:DocumentStatistics><gw:ContentGroups><gw:ContentGroup>"
+    "<gw:BriefDescription>Stub</gw:BriefDescription>"
+    "<gw:ContentItems><gw:ContentItem>"
+    "<gw:TechnicalDescription>Stub content</gw:TechnicalDescription>"
+    "<gw:InstanceCount>1</gw:InstanceCount>"
+    "</gw:ContentItem></gw:ContentItems>"
+    "<gw:IssueItems><gw:IssueItem>"
+    "<gw:TechnicalDescription>Stub issue</gw:TechnicalDescription>"
+    "<gw:IssueID>96</gw:IssueID>"
+    "<gw:InstanceCount>2</gw:InstanceCount>"
+    "</gw:IssueItem></gw:IssueItems>"
+    "<gw:SanitisationItems><gw:SanitisationItem>"
+    "<gw:TechnicalDescription>Stub sanitisation</gw:TechnicalDescription>"
+    "<gw:SanitisationID>128</gw:SanitisationID>"
+    "<gw:InstanceCount>1</gw:InstanceCount>"
+    "</gw:SanitisationItem></gw:SanitisationItems>"
+    "<gw:RemedyItems><gw:RemedyItem>"
+    "<gw:TechnicalDescription>Stub remedy</gw:TechnicalDescription>"
+    "<gw:RemedyID>129</gw:RemedyID>"
+    "<gw:InstanceCount>1</gw:InstanceCount>"
+    "</gw:RemedyItem></gw:RemedyItems>"
+    "</gw:ContentGroup></gw:ContentGroups></gw:DocumentStatistics>"
+    "</gw:GWallInfo>";
+
+static const char ID_INFO[] =
+    "<?xml version=\"1.0\" encoding=\"utf-8\"?>"
+    "<IdInfo>"
+    "<Group><IdStart>96</IdStart><IdEnd>127</IdEnd><Description>Stub structure</Description></Group>"
+    "<Group><IdStart>128</IdStart><IdEnd>255</IdEnd><Description>Stub content</Description></Group>"
+    "</IdInfo>";
+
+static const char ID_DESCRIPTION[] = "Stub structure";
+
+static wchar_t config[1 << 16] = L"<config/>";
+
+/* Set by GWStubConfigure, a negative size echoes the input */
+static long long stubOutputSize = -1;
+static unsigned int stubDelayMicroseconds;
+
+/* Output buffers are owned by the library and reused across calls, as in Glasswall */
+static void *output;
+static size_t outputCapacity;
+static char reportOutput[sizeof(REPORT)];
+
+static void *reserve(size_t size)
+{
+    if (size > outputCapacity || output == NULL) {
+        free(output);
+        output = malloc(size ? size : 1);
+        outputCapacity = size;
+    }
+    return output;
+}
+
+static void delay(void)
+{
+    struct timespec duration;
+
+    if (stubDelayMicroseconds == 0)
+        return;
+    duration.tv_sec = stubDelayMicroseconds / 1000000;
+    duration.tv_nsec = (long)(stubDelayMicroseconds % 1000000) * 1000;
+    nanosleep(&duration, NULL);
+}
+
+/* Fills a buffer by repeating the input, or with zeros when there is none */
+static void fill(char *buffer, size_t size, const char *input, size_t inputSize)
+{
+    size_t offset;
+
+    if (inputSize == 0) {
+        memset(buffer, 0, size);
+        return;
+    }
+    for (offset = 0; offset < size; offset += inputSize)
+        memcpy(buffer + offset, input, size - offset < inputSize ? size - offset : inputSize);
+}
+
+static char *readFile(const wchar_t *path, size_t *size)
+{
+    char name[4096];
+    FILE *f;
+    long length;
+    char *content;
+
+    *size = 0;
+    if (wcstombs(name, path, sizeof(name)) == (size_t)-1)
+        return NULL;
+    if ((f = fopen(name, "rb")) == NULL)
+        return NULL;
+
+    fseek(f, 0, SEEK_END);
+    length = ftell(f);
+    fseek(f, 0, SEEK_SET);
+
+    content = malloc(length ? length : 1);
+    *size = fread(content, 1, length, f);
+    fclose(f);
+    return content;
+}
+
+static int memoryToMemory(const void *input, size_t inputSize, void **outputBuffer, size_t *outputSize)
+{
+    size_t size = stubOutputSize < 0 ? inputSize : (size_t)stubOutputSize;
+    void *buffer = reserve(size);
+
+    delay();
+    fill(buffer, size, input, inputSize);
+    *outputBuffer = buffer;
+    *outputSize = size;
+    return 1;
+}
+
+static int fileToMemory(const wchar_t *path, void **outputBuffer, size_t *outputSize)
+{
+    size_t size;
+    char *content = readFile(path, &size);
+    int status;
+
+    if (content == NULL) {
+        *outputBuffer = NULL;
+        *outputSize = 0;
+        return 0;
+    }
+    status = memoryToMemory(content, size, outputBuffer, outputSize);
+    free(content);
+    return status;
+}
+
+static int fileToFile(const wchar_t *path, const wchar_t *outputPath)
+{
+    char name[4096];
+    size_t size;
+    char *content = readFile(path, &size);
+    void *buffer;
+    size_t bufferSize;
+    FILE *f;
+
+    if (content == NULL)
+        return 0;
+    if (wcstombs(name, outputPath, sizeof(name)) == (size_t)-1 || (f = fopen(name, "wb")) == NULL) {
+        free(content);
+        return 0;
+    }
+    memoryToMemory(content, size, &buffer, &bufferSize);
+    fwrite(buffer, 1, bufferSize, f);
+    fclose(f);
+    free(content);
+    return 1;
+}
+
+static int report(void **reportBuffer, size_t *reportSize)
+{
+    memcpy(reportOutput, REPORT, sizeof(REPORT) - 1);
+    *reportBuffer = reportOutput;
+    *reportSize = sizeof(REPORT) - 1;
+    return 1;
+}
+
+static int determineFileType(const void *buffer, size_t size)
+{
+    /* 23 is the Glasswall file type value for PNG, 1 is unknown */
+    return size >= 4 && memcmp(buffer, "\x89PNG", 4) == 0 ? 23 : 1;
+}
+
+int GWStubConfigure(long long outputSize, unsigned int delayMicroseconds)
+{
+    stubOutputSize = outputSize;
+    stubDelayMicroseconds = delayMicroseconds;
+    return 1;
+}
+
+int GWFileConfigXML(const wchar_t *xml)
+{
+    delay();
+    wcsncpy(config, xml, sizeof(config) / sizeof(config[0]) - 1);
+    return 1;
+}
+
+int GWFileConfigGet(wchar_t **configuration, size_t *size)
+{
+    *configuration = config;
+    *size = wcslen(config);
+    return 1;
+}
+
+int GWFileConfigRevertToDefaults(void)
+{
+    wcscpy(config, L"<config/>");
+    return 1;
+}
+
+int GWGetIdInfo(uint32_t issueId, size_t *size, char **description)
+{
+    (void)issueId;
+    *description = (char *)ID_DESCRIPTION;
+    *size = sizeof(ID_DESCRIPTION) - 1;
+    return 1;
+}
+
+int GWGetAllIdInfo(size_t *size, char **xml)
+{
+    *xml = (char *)ID_INFO;
+    *size = sizeof(ID_INFO) - 1;
+    return 1;
+}
+
+int GWFileProtectLite(const wchar_t *path, const wchar_t *type, void **out, size_t *size)
+{
+    (void)type;
+    return fileToMemory(path, out, size);
+}
+
+int GWFileProtect(const wchar_t *path, const wchar_t *type, void **out, size_t *size)
+{
+    (void)type;
+    return fileToMemory(path, out, size);
+}
+
+int GWFileAnalysisAudit(const wchar_t *path, const wchar_t *type, void **out, size_t *size)
+{
+    (void)path;
+    (void)type;
+    delay();
+    return report(out, size);
+}
+
+int GWFileToFileProtectLite(const wchar_t *path, const wchar_t *type, const wchar_t *outPath)
+{
+    (void)type;
+    return fileToFile(path, outPath);
+}
+
+int GWFileToFileProtect(const wchar_t *path, const wchar_t *type, const wchar_t *outPath)
+{
+    (void)type;
+    return fileToFile(path, outPath);
+}
+
+int GWFileToFileAnalysisAudit(const wchar_t *path, const wchar_t *type, const wchar_t *outPath)
+{
+    (void)type;
+    return fileToFile(path, outPath);
+}
+
+int GWFileToFileAnalysisProtectAndExport(const wchar_t *path, const wchar_t *outPath)
+{
+    return fileToFile(path, outPath);
+}
+
+int GWFileToFileProtectAndImport(const wchar_t *path, const wchar_t *outPath)
+{
+    return fileToFile(path, outPath);
+}
+
+int GWFileToMemoryProtectAndImport(const wchar_t *path, void **out, size_t *size)
+{
+    return fileToMemory(path, out, size);
+}
+
+int GWFileToMemoryAnalysisProtectAndExport(const wchar_t *path, void **out, size_t *size)
+{
+    return fileToMemory(path, out, size);
+}
+
+int GWFileProtectLiteAndReport(const wchar_t *path, const wchar_t *type, void **out, size_t *size,
+                               void **reportOut, size_t *reportSize)
+{
+    (void)type;
+    report(reportOut, reportSize);
+    return fileToMemory(path, out, size);
+}
+
+int GWFileProtectAndReport(const wchar_t *path, const wchar_t *type, void **out, size_t *size,
+                           void **reportOut, size_t *reportSize)
+{
+    (void)type;
+    report(reportOut, reportSize);
+    return fileToMemory(path, out, size);
+}
+
+int GWFileToFileProtectLiteAndReport(const wchar_t *path, const wchar_t *type, const wchar_t *outPath,
+                                     const wchar_t *reportPath)
+{
+    (void)type;
+    (void)reportPath;
+    return fileToFile(path, outPath);
+}
+
+int GWFileToFileProtectAndReport(const wchar_t *path, const wchar_t *type, const wchar_t *outPath,
+                                 const wchar_t *reportPath)
+{
+    (void)type;
+    (void)reportPath;
+    return fileToFile(path, outPath);
+}
+
+int GWFileAnalysisAuditAndReport(const wchar_t *path, const wchar_t *type, void **out, size_t *size,
+                                 void **reportOut, size_t *reportSize)
+{
+    (void)type;
+    report(reportOut, reportSize);
+    return fileToMemory(path, out, size);
+}
+
+int GWFileToFileAnalysisAuditAndReport(const wchar_t *path, const wchar_t *type, const wchar_t *outPath,
+                                       const wchar_t *reportPath)
+{
+    (void)type;
+    (void)reportPath;
+    return fileToFile(path, outPath);
+}
+
+int GWMemoryToMemoryProtect(const void *buffer, size_t bufferSize, const wchar_t *type, void **out, size_t *size)
+{
+    (void)type;
+    return memoryToMemory(buffer, bufferSize, out, size);
+}
+
+int GWMemoryToMemoryAnalysisAudit(const void *buffer, size_t bufferSize, const wchar_t *type, void **out,
+                                  size_t *size)
+{
+    (void)buffer;
+    (void)bufferSize;
+    (void)type;
+    delay();
+    return report(out, size);
+}
+
+int GWFileProcessStatus(unsigned int *status)
+{
+    *status = 0;
+    return 1;
+}
+
+int GWDetermineFileTypeFromFile(const wchar_t *path)
+{
+    size_t size;
+    char *content = readFile(path, &size);
+    int fileType = content ? determineFileType(content, size) : 1;
+
+    free(content);
+    return fileType;
+}
+
+int GWDetermineFileTypeFromFileAndReport(const wchar_t *path, void **reportOut, size_t *reportSize)
+{
+    report(reportOut, reportSize);
+    return GWDetermineFileTypeFromFile(path);
+}
+
+int GWDetermineFileTypeFromFileInMem(const void *buffer, size_t size)
+{
+    return determineFileType(buffer, size);
+}
+
+int GWDetermineFileTypeFromFileInMemAndReport(const void *buffer, size_t size, void **reportOut, size_t *reportSize)
+{
+    report(reportOut, reportSize);
+    return determineFileType(buffer, size);
+}
+
+int GWFileDone(void)
+{
+    free(output);
+    output = NULL;
+    outputCapacity = 0;
+    return 1;
+}
+
+const wchar_t *GWFileVersion(void)
+{
+    return L"0.0.0-stub";
+}
+
+const wchar_t *GWFileProcessMsg(void)
+{
+    return L"Stub process message";
+}
+
+const wchar_t *GWFileErrorMsg(void)
+{
+    return L"Stub error message";
+}
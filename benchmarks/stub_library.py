@@ -0,0 +1,21 @@
+import os
+import subprocess
+
+STUB_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub", "glasswall_stub.c")
+
+
+def build_stub_library(outputDir, compiler=None):
+    """Compiles the stub Glasswall library into the given directory.
+
+    :param str outputDir: The directory to write the shared library to.
+    :param str compiler: The C compiler to use, $CC or cc by default.
+    :return: The file path to the compiled library.
+    :rtype: str
+    """
+
+    compiler = compiler or os.environ.get("CC", "cc")
+    libraryPath = os.path.join(outputDir, "libglasswall.stub.so")
+
+    subprocess.check_call([compiler, "-shared", "-fPIC", "-O2", "-o", libraryPath, STUB_SOURCE])
+
+    return libraryPath
@@ -0,0 +1,85 @@
+import os
+import copy
+
+from result_cache import hash_file
+
+
+class Deduplicator:
+    """Finds files with identical content so each content is processed by the engine once.
+
+    Files are grouped by size first, and only files sharing their size with another are
+    hashed, so a tree of distinct files is never read here.
+    """
+
+    def __init__(self):
+        # Duplicate paths of each file sent to the engine in their place
+        self.duplicates = {}  # type: dict
+        self.filesHashed = 0  # type: int
+
+    @property
+    def saved(self):
+        """The number of engine calls saved, one per duplicate file."""
+
+        return sum(len(paths) for paths in self.duplicates.values())
+
+    def unique(self, paths):
+        """Returns the files to process, the first file of each distinct content in the order given.
+
+        Files that cannot be read are kept, for the engine to report.
+
+        :param iterable paths: The candidate file paths.
+        :return: The file paths with distinct content.
+        :rtype: list
+        """
+
+        paths = list(paths)
+        bySize = {}
+        for path in paths:
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                continue
+            bySize.setdefault(size, []).append(path)
+
+        duplicates = set()
+        for group in bySize.values():
+            if len(group) < 2:
+                continue
+            byHash = {}
+            for path in group:
+                try:
+                    digest = hash_file(path)
+                except OSError:
+                    continue
+                self.filesHashed += 1
+                first = byHash.setdefault(digest, path)
+                if first is not path:
+                    self.duplicates.setdefault(first, []).append(path)
+                    duplicates.add(path)
+
+        return [path for path in paths if path not in duplicates]
+
+    def fan_out(self, result):
+        """Returns the result of a processed file followed by a result for each of its duplicates.
+
+        The duplicates share the outcome of the file, with no timings of their own and
+        duplicateOf naming the file that was processed.
+
+        :param rebuild_pool.RebuildResult result: The result of a file returned by unique().
+        :rtype: list
+        """
+
+        results = [result]
+        for path in self.duplicates.get(result.path, ()):
+            duplicate = copy.copy(result)
+            duplicate.path = path
+            duplicate.duplicateOf = result.path
+            duplicate.timings = {}
+            duplicate.microseconds = 0
+            duplicate.reset = False
+            duplicate.retried = False
+            # A file written by the engine is renamed into place once, the duplicates copy it
+            duplicate.outputTemp = None
+            duplicate.outputSource = result.path if result.outputTemp is not None else None
+            results.append(duplicate)
+        return results
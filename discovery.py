@@ -0,0 +1,144 @@
+import os
+
+# Directories never worth scanning for files to rebuild
+DEFAULT_EXCLUDE_DIRS = (".git",)
+
+
+def normalise_extension(fileType):
+    """Returns the file suffix matched for a filetype argument, e.g. "png" or ".PNG" give ".png".
+
+    :param str fileType: The filetype argument.
+    :rtype: str
+    """
+
+    return "." + fileType.lstrip(".").lower()
+
+
+def has_extension(path, extension):
+    """Returns whether a file name ends with the given suffix, ignoring case.
+
+    :param str path: The file path or name.
+    :param str extension: The suffix, as returned by normalise_extension().
+    :rtype: bool
+    """
+
+    return path.lower().endswith(extension)
+
+
+def _inside(path, realRoot):
+    """Returns whether the target of a path, following every symlink, is under a directory.
+
+    :param str path: The path.
+    :param str realRoot: The directory, as returned by os.path.realpath().
+    :rtype: bool
+    """
+
+    realPath = os.path.realpath(path)
+    return realPath == realRoot or realPath.startswith(os.path.join(realRoot, ""))
+
+
+def discover_files(root, extension, excludeDirs=DEFAULT_EXCLUDE_DIRS, ordered=False):
+    """Walks a directory tree and yields matching files as soon as they are found.
+
+    Directories named in excludeDirs are not entered. Symbolic links are followed when
+    their target is under root, so a link cannot pull files from elsewhere on the runner
+    into the scan, and every file or directory is visited once however many hardlinks or
+    symlinks lead to it, which also protects against symlink loops.
+
+    :param str root: The directory to scan.
+    :param str extension: The suffix of the files to yield, as returned by normalise_extension(),
+        or None to yield every file.
+    :param iterable excludeDirs: Directory names to skip wherever they appear.
+    :param bool ordered: Visit the entries of each directory in name order, so a tree is
+        always walked in the same order and the same one of several links to a file is kept,
+        whatever order the filesystem lists them in.
+    :return: A generator of file paths.
+    """
+
+    excludeDirs = frozenset(excludeDirs)
+
+    try:
+        st = os.stat(root)
+    except OSError:
+        return
+
+    realRoot = os.path.realpath(root)
+    seen = {(st.st_dev, st.st_ino)}
+    stack = [(root, st.st_dev)]
+
+    while stack:
+        directory, device = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+
+        with entries:
+            if ordered:
+                entries = sorted(entries, key=lambda entry: entry.name)
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        if entry.name in excludeDirs:
+                            continue
+                        if entry.is_symlink() and not _inside(entry.path, realRoot):
+                            continue
+                        st = entry.stat()
+                        key = (st.st_dev, st.st_ino)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        stack.append((entry.path, st.st_dev))
+
+                    elif entry.is_file() and (extension is None or has_extension(entry.name, extension)):
+                        # scandir already knows the inode of plain entries, only links need a stat
+                        if entry.is_symlink():
+                            if not _inside(entry.path, realRoot):
+                                continue
+                            st = entry.stat()
+                            key = (st.st_dev, st.st_ino)
+                        else:
+                            key = (device, entry.inode())
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        yield entry.path
+
+                except OSError:
+                    # Broken symlinks and entries removed while scanning
+                    continue
+
+
+def select_files(paths, root, extension, excludeDirs=DEFAULT_EXCLUDE_DIRS):
+    """Applies the discover_files() rules to an existing list of files under root, such as
+    the files changed by a commit.
+
+    :param iterable paths: The file paths to filter.
+    :param str root: The directory the paths are under.
+    :param str extension: The suffix of the files to yield, as returned by normalise_extension(),
+        or None to yield every file.
+    :param iterable excludeDirs: Directory names to skip wherever they appear.
+    :return: A generator of file paths.
+    """
+
+    excludeDirs = frozenset(excludeDirs)
+    realRoot = os.path.realpath(root)
+    seen = set()
+
+    for path in paths:
+        if extension is not None and not has_extension(path, extension):
+            continue
+        parts = os.path.relpath(path, root).split(os.sep)[:-1]
+        if excludeDirs.intersection(parts):
+            continue
+        if not _inside(path, realRoot):
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        key = (st.st_dev, st.st_ino)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield path
@@ -3,8 +3,43 @@
 echo "Entrypoint Shell"
 
 echo "Parameter: filetype, Value: $1"
+echo "Parameter: workers, Value: $2"
+echo "Parameter: cache-dir, Value: $3"
+echo "Parameter: cache-size, Value: $4"
+echo "Parameter: base-ref, Value: $5"
+echo "Parameter: ingest, Value: $6"
+echo "Parameter: exclude-dirs, Value: $7"
+echo "Parameter: route-by-header, Value: $8"
+echo "Parameter: results, Value: $9"
+echo "Parameter: log-level, Value: ${10}"
+echo "Parameter: reset-files, Value: ${11}"
+echo "Parameter: memory-limit, Value: ${12}"
+echo "Parameter: max-tasks-per-worker, Value: ${13}"
+echo "Parameter: file-timeout, Value: ${14}"
+echo "Parameter: file-to-file-size, Value: ${15}"
+echo "Parameter: output-dir, Value: ${16}"
+echo "Parameter: fsync, Value: ${17}"
+echo "Parameter: dedupe, Value: ${18}"
+echo "Parameter: shard-index, Value: ${19}"
+echo "Parameter: shard-count, Value: ${20}"
+echo "Parameter: schedule, Value: ${21}"
 
-python /hello.py -v $GITHUB_WORKSPACE -f $1
+route_by_header=""
+if [ "$8" = "true" ]; then
+    route_by_header="--route-by-header"
+fi
+
+dedupe=""
+if [ "${18}" = "true" ]; then
+    dedupe="--dedupe"
+fi
+
+python /hello.py -v $GITHUB_WORKSPACE -f "$1" ${2:+-w $2} ${3:+--cache-dir $GITHUB_WORKSPACE/$3} ${4:+--cache-size $4} \
+    ${5:+--base-ref $5} ${6:+--ingest $6} ${7:+--exclude-dir $7} $route_by_header \
+    ${9:+--results $9} ${10:+--log-level ${10}} ${11:+--reset-files ${11}} ${12:+--memory-limit ${12}} \
+    ${13:+--max-tasks-per-worker ${13}} ${14:+--file-timeout ${14}} ${15:+--file-to-file-size ${15}} \
+    ${16:+--output-dir $GITHUB_WORKSPACE/${16}} ${17:+--fsync ${17}} $dedupe \
+    ${19:+--shard-index ${19}} ${20:+--shard-count ${20}} ${21:+--schedule ${21}}
 
 time=$(date)
 echo "::set-output name=time::$time"
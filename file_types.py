@@ -0,0 +1,312 @@
+import os
+import time
+import struct
+import sqlite3
+
+# Bytes read from the start of a file to classify it
+HEADER_SIZE = 4096
+
+# File type values returned by the GWDetermineFileType functions, mapped to the file type
+# strings accepted by the processing functions
+FILE_TYPE_NAMES = {
+    16: "pdf",
+    17: "doc",
+    18: "docx",
+    19: "ppt",
+    20: "pptx",
+    21: "xls",
+    22: "xlsx",
+    23: "png",
+    24: "jpeg",
+    25: "gif",
+    26: "emf",
+    27: "wmf",
+    28: "rtf",
+    29: "bmp",
+    30: "tiff",
+    31: "pe",
+    32: "macho",
+    33: "elf",
+    34: "mp4",
+    35: "mp3"
+}
+
+# Other names used for the same file types
+FILE_TYPE_ALIASES = {
+    "jpg": "jpeg",
+    "tif": "tiff",
+    "exe": "pe",
+    "dll": "pe"
+}
+
+# Requested file type matching every detected type
+ANY_FILE_TYPE = "*"
+
+# Container formats whose header does not tell which file type they hold, e.g. a zip
+# header is shared by docx, xlsx and pptx
+AMBIGUOUS = "ambiguous"
+
+# (offset, magic number, file type) checked in order against the start of a file. Types
+# with a short magic number are also checked by their entry in _HEADER_CHECKS
+MAGIC_NUMBERS = [
+    (0, b"\x89PNG\r\n\x1a\n", "png"),
+    (0, b"\xff\xd8\xff", "jpeg"),
+    (0, b"GIF87a", "gif"),
+    (0, b"GIF89a", "gif"),
+    (0, b"%PDF-", "pdf"),
+    (0, b"{\\rtf", "rtf"),
+    (0, b"BM", "bmp"),
+    (0, b"II*\x00", "tiff"),
+    (0, b"MM\x00*", "tiff"),
+    (40, b" EMF", "emf"),
+    (0, b"\xd7\xcd\xc6\x9a", "wmf"),
+    (0, b"\x7fELF", "elf"),
+    (0, b"\xfe\xed\xfa\xce", "macho"),
+    (0, b"\xfe\xed\xfa\xcf", "macho"),
+    (0, b"\xce\xfa\xed\xfe", "macho"),
+    (0, b"\xcf\xfa\xed\xfe", "macho"),
+    (0, b"MZ", "pe"),
+    (4, b"ftyp", "mp4"),
+    (0, b"ID3", "mp3"),
+    (0, b"PK\x03\x04", AMBIGUOUS),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", AMBIGUOUS)
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_types (
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    file_type TEXT,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (device, inode, mtime_ns, size)
+);
+CREATE INDEX IF NOT EXISTS file_types_last_used ON file_types (last_used);
+"""
+
+
+# Sizes of the BITMAPCOREHEADER, BITMAPINFOHEADER and later DIB headers following the
+# 14 byte bitmap file header
+_DIB_HEADER_SIZES = frozenset((12, 16, 40, 52, 56, 64, 108, 124))
+
+
+def _is_bmp(header):
+    """Returns whether a header starting with "BM" is a bitmap file header: zero reserved
+    fields, a known DIB header size, and pixel data starting after both headers.
+    """
+
+    if len(header) < 18:
+        return False
+    reserved, pixelOffset, dibSize = struct.unpack_from("<III", header, 6)
+    return reserved == 0 and dibSize in _DIB_HEADER_SIZES and pixelOffset >= 14 + dibSize
+
+
+def _is_pe(header):
+    """Returns whether a header starting with "MZ" points at a PE signature within it."""
+
+    if len(header) < 0x40:
+        return False
+    peOffset = struct.unpack_from("<I", header, 0x3C)[0]
+    return 0x40 <= peOffset and header[peOffset:peOffset + 4] == b"PE\x00\x00"
+
+
+# Two byte magic numbers are common at the start of text and other files, so the rest of
+# their header must match too
+_HEADER_CHECKS = {
+    "bmp": _is_bmp,
+    "pe": _is_pe
+}
+
+
+def sniff_file_type(header):
+    """Classifies a file from its first bytes using the magic number table.
+
+    :param header: The start of the file, at least a few bytes.
+    :return: The file type, AMBIGUOUS for containers, or None when not recognised.
+    :rtype: str or None
+    """
+
+    for offset, magic, fileType in MAGIC_NUMBERS:
+        if header[offset:offset + len(magic)] == magic:
+            check = _HEADER_CHECKS.get(fileType)
+            if check is not None and not check(header):
+                continue
+            return fileType
+    return None
+
+
+def file_type_name(enumValue):
+    """Returns the file type string for a GWDetermineFileType result.
+
+    :param int enumValue: The determined file type value.
+    :return: The file type, or None for unknown files and errors.
+    :rtype: str or None
+    """
+
+    return FILE_TYPE_NAMES.get(enumValue)
+
+
+def normalise_file_type(fileType):
+    """Returns the canonical name of a requested file type, e.g. ".JPG" gives "jpeg".
+
+    :param str fileType: The requested file type.
+    :rtype: str
+    """
+
+    fileType = fileType.lstrip(".").lower()
+    return FILE_TYPE_ALIASES.get(fileType, fileType)
+
+
+def file_key(st):
+    """Returns the classification cache key for a file's stat result.
+
+    :param os.stat_result st: The stat result of the file.
+    :rtype: tuple
+    """
+
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class FileTypeCache:
+    """Remembers file classifications by (device, inode, mtime, size).
+
+    Kept in memory for the run, and also in a SQLite index when given a cache directory so
+    repeat runs over the same files skip the sniffing.
+    """
+
+    fileName = "file_types.sqlite"
+
+    # Entries not used for this long are removed by prune()
+    maxAge = 30 * 24 * 60 * 60
+
+    def __init__(self, cacheDir=None):
+        """Opens the cache.
+
+        :param str cacheDir: An optional directory to persist classifications in.
+        """
+
+        self._memory = {}
+        self._db = None
+
+        if cacheDir:
+            # Every worker opens the cache at the same time, any of them may create it
+            os.makedirs(cacheDir, exist_ok=True)
+            self._db = sqlite3.connect(os.path.join(cacheDir, self.fileName), timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+            self._db.commit()
+
+    def get(self, key):
+        """Looks up a classification.
+
+        :param tuple key: The key returned by file_key().
+        :return: A (found, file type) pair, the file type is None for unrecognised files.
+        :rtype: tuple
+        """
+
+        if key in self._memory:
+            return True, self._memory[key]
+
+        if self._db is None:
+            return False, None
+
+        row = self._db.execute(
+            "SELECT file_type FROM file_types WHERE device = ? AND inode = ? AND mtime_ns = ? AND size = ?",
+            key
+        ).fetchone()
+        if row is None:
+            return False, None
+
+        self._db.execute(
+            "UPDATE file_types SET last_used = ? WHERE device = ? AND inode = ? AND mtime_ns = ? AND size = ?",
+            (time.time(),) + key
+        )
+        self._db.commit()
+        self._memory[key] = row[0]
+        return True, row[0]
+
+    def put(self, key, fileType):
+        """Stores a classification.
+
+        :param tuple key: The key returned by file_key().
+        :param str fileType: The file type, or None for unrecognised files.
+        """
+
+        self._memory[key] = fileType
+
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO file_types (device, inode, mtime_ns, size, file_type, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                key + (fileType, time.time())
+            )
+            self._db.commit()
+
+    def prune(self):
+        """Removes persisted classifications that have not been used for maxAge seconds.
+
+        :return: The number of entries removed.
+        :rtype: int
+        """
+
+        if self._db is None:
+            return 0
+
+        cursor = self._db.execute("DELETE FROM file_types WHERE last_used < ?", (time.time() - self.maxAge,))
+        self._db.commit()
+        return cursor.rowcount
+
+    def close(self):
+        """Closes the cache index."""
+
+        if self._db is not None:
+            self._db.close()
+
+
+def read_header(path):
+    """Reads the first HEADER_SIZE bytes of a file.
+
+    :param str path: The file path.
+    :rtype: bytes
+    """
+
+    with open(path, "rb") as f:
+        return f.read(HEADER_SIZE)
+
+
+def classify_file(gw, path, st, cache, header=None):
+    """Determines a file's type from its header.
+
+    The magic number table answers most files without calling the engine. Unrecognised
+    headers are classified with GWDetermineFileTypeFromFileInMem, and containers such as
+    zip or OLE2 files, whose header is shared by several types, with
+    GWDetermineFileTypeFromFile on the whole file.
+
+    :param Glasswall.Glasswall gw: The Glasswall library.
+    :param str path: The file path.
+    :param os.stat_result st: The stat result of the file.
+    :param FileTypeCache cache: The classification cache.
+    :param header: The first HEADER_SIZE bytes of the file if already available, otherwise
+        they are read only when the classification is not cached.
+    :return: The file type, or None when it could not be determined.
+    :rtype: str or None
+    """
+
+    key = file_key(st)
+    found, fileType = cache.get(key)
+    if found:
+        return fileType
+
+    if header is None:
+        header = read_header(path)
+
+    fileType = sniff_file_type(header)
+    if fileType == AMBIGUOUS:
+        fileType = file_type_name(gw.GWDetermineFileTypeFromFile(path).enumValue)
+    elif fileType is None:
+        fileType = file_type_name(gw.GWDetermineFileTypeFromFileInMem(header).enumValue)
+
+    cache.put(key, fileType)
+    return fileType
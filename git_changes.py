@@ -0,0 +1,49 @@
+import os
+import subprocess
+
+# The base reported by push events that create a branch, there is nothing to diff against
+NULL_SHA = "0" * 40
+
+
+def changed_files(repoDir, baseRef, headRef="HEAD"):
+    """Returns the files added or modified between a base ref and HEAD.
+
+    Renamed and copied files are reported under their new path and deleted files are
+    skipped. The diff runs against the merge base, so a pull request base branch works as
+    well as the previous commit of a push.
+
+    :param str repoDir: A directory inside the git working tree.
+    :param str baseRef: The commit, branch or tag to compare against.
+    :param str headRef: The commit to compare, HEAD by default.
+    :return: The changed file paths joined onto repoDir, or None when no diff is available
+        (no base, base not fetched, not a git repository) and a full scan is needed.
+    :rtype: list or None
+    """
+
+    if not baseRef or baseRef == NULL_SHA:
+        return None
+
+    command = [
+        "git", "-c", "safe.directory=" + os.path.abspath(repoDir), "-C", repoDir,
+        "diff", "--name-only", "--relative", "-z", "--find-renames", "--diff-filter=ACMRT",
+        baseRef + "..." + headRef, "--"
+    ]
+
+    try:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        output, _ = process.communicate()
+    except OSError:
+        return None
+
+    if process.returncode != 0:
+        return None
+
+    paths = []
+    for name in output.decode("utf-8", "surrogateescape").split("\0"):
+        if not name:
+            continue
+        path = os.path.join(repoDir, name)
+        if os.path.isfile(path):
+            paths.append(path)
+
+    return paths
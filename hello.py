@@ -1,205 +1,296 @@
 import sys
 import os
-import ctypes as ct
-import datetime
+import argparse
+import logging
+
+from rebuild_pool import RebuildPool, RebuildTask, RebuildWorkerError, usable_cpus
+from result_cache import ResultCache
+from git_changes import changed_files
+from ingest import INGEST_MODES, INGEST_PATH
+from file_types import FileTypeCache
+from discovery import DEFAULT_EXCLUDE_DIRS, normalise_extension, discover_files, select_files
+from result_sinks import SINK_FORMATS, parse_sink, open_sink
+from run_stats import PHASE_DISCOVERY, PHASE_REPORT, RunStats, now_ns, timed
+from dedupe import Deduplicator
+from sharding import shard_files
+from scheduling import SCHEDULES, SCHEDULE_DISCOVERY, SCHEDULE_LONGEST_FIRST, COST_MODEL_FILE, CostModel, longest_first
+from output_tree import FSYNC_POLICIES, FSYNC_NONE, OutputWriter
+from run_log import LOG_LEVELS, LOG_INFO, log, configure_logging
 
-# Glasswall Code
-class GwMemReturnObj:
-    """A result from Glasswall containing the return status along with the file buffer"""
-
-    def __init__(self):
-        pass
-
-    returnStatus = 0  # type: int
-    fileBuffer = None  # type: bytearray or None
-
-class GwStatusReturnObj:
-    """A result from Glasswall containing the return status."""
-
-    def __init__(self):
-        pass
-
-    returnStatus = 0  # type: int
-
-class Glasswall:
-    """A Python API wrapper around the Glasswall library."""
-
-    gwLibrary = None
-    
-    def __init__(self, pathToLib):
-        """Constructor for the Glasswall library
-
-        :param str pathToLib: The file path to the Glasswall library.
-        """
-
-        try:
-            self.gwLibrary = ct.cdll.LoadLibrary(pathToLib)
-        except Exception as e:
-            raise Exception("Failed to load Glasswall library. Exception: {0}".format(e.message))
-        
-
-    def GWFileProtect(self, inputFilePath, fileType):
-        """Protects the file in File to Memory Protect mode. The file buffer will be None if the file is non-conforming.
-
-        :param str inputFilePath: The file path to the file to be processed.
-        :param str fileType: The file type of the file to be processed.
-        :return: A result indicating the file process status along with the protected file.
-        :rtype: GwMemReturnObj
-        """
-
-        # API function declaration
-        self.gwLibrary.GWFileProtect.argtypes = [
-            ct.c_wchar_p,
-            ct.c_wchar_p,
-            ct.POINTER(ct.c_void_p),
-            ct.POINTER(ct.c_size_t)
-        ]
-
-        # Variable initialisation
-        ct_filePath = ct.c_wchar_p(inputFilePath)
-        ct_fileType = ct.c_wchar_p(fileType)
-        ct_fileBuffer = ct.c_void_p(0)
-        ct_size = ct.c_size_t(0)
-
-        # Return Object
-        gwReturn = GwMemReturnObj()
-
-        # API Call
-        gwReturn.returnStatus = self.gwLibrary.GWFileProtect(
-            ct_filePath,
-            ct_fileType,
-            ct.byref(ct_fileBuffer),
-            ct.byref(ct_size)
-        )
-
-        # Convert outputBuffer to python bytearray
-        fileBuffer = (ct.c_byte * ct_size.value)()
-        ct.memmove(fileBuffer, ct_fileBuffer.value, ct_size.value)
-        gwReturn.fileBuffer = bytearray(fileBuffer)
-
-        return gwReturn
-
-    def GWFileConfigXML(self, xmlString):
-        """Applies the given XML content management configuration to the Glasswall library.
-
-        :param str xmlString: The XML content management configuration.
-        :return: A result indicating the status of the call.
-        :rtype: GwStatusReturnObj
-        """
-
-        # API function declaration
-        self.gwLibrary.GWFileConfigXML.argtypes = [ct.c_wchar_p]
-
-        # Return Object
-        gwReturn = GwStatusReturnObj()
-
-        # API Call
-        gwReturn.returnStatus = self.gwLibrary.GWFileConfigXML(
-            ct.c_wchar_p(xmlString)
-        )
-
-        return gwReturn
-
-    def GWFileErrorMsg(self):
-        """Returns the file error message from the previous call made to Glasswall.
-
-        :return: A result with the file error message.
-        :rtype: GwStringReturnObj
-        """
-
-        # Declare the return type
-        self.gwLibrary.GWFileErrorMsg.restype = ct.POINTER(ct.c_wchar)
-
-        # Return Object
-        gwReturn = GwStringReturnObj()
-
-        # API Call
-        ct_string = self.gwLibrary.GWFileErrorMsg()
-
-        gwReturn.text = ct.wstring_at(ct_string)
-
-        return gwReturn
-
-# Glasswall Code
-
-class Log:
-    @staticmethod
-    def debug(content):
-        line = "--[debug] " + content
-        #print(line)
-
-    @staticmethod
-    def info(content):
-        line = "--[info] " + content
-        print(line)
-    
-    @staticmethod
-    def warn(content):
-        line = "--[warn] " + content
-        print(line)
 
 def validate_github_volume(volume):
     os.curdir = volume
-    items = os.listdir(volume)
-    Log.debug("In Directory: " + volume)
-    Log.debug(str(items))
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("In Directory: %s", volume)
+        log.debug("%s", os.listdir(volume))
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Process files using the Glasswall Rebuild engine")
+    parser.add_argument("-v", "--volume", required=True, help="Directory to scan for files")
+    parser.add_argument("-f", "--filetype", required=True, help="Filetype to process")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Number of rebuild worker processes (default: usable CPUs)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Directory of the persistent result cache, persist it between runs to skip unchanged files")
+    parser.add_argument("--cache-size", type=int, default=256,
+                        help="Result cache budget in megabytes, least recently used entries are evicted beyond it")
+    parser.add_argument("--ingest", choices=INGEST_MODES, default=INGEST_PATH,
+                        help="Pass file paths to the engine, or memory map files and pass their content")
+    parser.add_argument("--exclude-dir", action="append", default=list(DEFAULT_EXCLUDE_DIRS),
+                        help="Directory names to skip while scanning, comma separated or repeated (.git is always skipped)")
+    parser.add_argument("--route-by-header", action="store_true",
+                        help="Select files and their type from the file header instead of the extension, "
+                             "-f * processes every recognised type")
+    parser.add_argument("--base-ref", default=None,
+                        help="Only process files added or modified between this ref and HEAD, full scan when unavailable")
+    parser.add_argument("--results", action="append", default=[],
+                        help="Write a record per file as FORMAT:PATH, FORMAT one of " + ", ".join(SINK_FORMATS)
+                             + ", comma separated or repeated")
+    parser.add_argument("--shard-index", type=int, default=0,
+                        help="Process only this shard of the discovered files, from 0 to shard count - 1")
+    parser.add_argument("--shard-count", type=int, default=1,
+                        help="Split the discovered files into this many shards of similar total size")
+    parser.add_argument("--schedule", choices=SCHEDULES, default=SCHEDULE_DISCOVERY,
+                        help="Send files to the workers as they are found, or once discovery has finished, "
+                             "longest predicted processing time first")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Process each distinct file content once and report the result for every copy")
+    parser.add_argument("--output-dir",
+                        help="Write each rebuilt file to this directory, mirroring the scanned tree")
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default=FSYNC_NONE,
+                        help="Flush rebuilt files to disk per file, per directory, or once at the end")
+    parser.add_argument("--file-to-file-size", type=float, default=0,
+                        help="Protect files larger than this many megabytes with GWFileToFileProtect instead of in memory")
+    parser.add_argument("--reset-files", type=int, default=0,
+                        help="Release engine memory with GWFileDone and re-apply the configuration every N files per worker")
+    parser.add_argument("--memory-limit", type=int, default=0,
+                        help="Do the same whenever a worker's resident memory exceeds this many megabytes, "
+                             "and replace the worker when a reset does not bring it back under")
+    parser.add_argument("--max-tasks-per-worker", type=int, default=0,
+                        help="Replace each worker with a fresh process after it has processed N files")
+    parser.add_argument("--file-timeout", type=float, default=0,
+                        help="Seconds a worker may spend on one file before it is killed, the file is retried once "
+                             "in a fresh worker with a longer budget (default: no limit)")
+    parser.add_argument("--retry-timeout-factor", type=float, default=4,
+                        help="Budget of the retry of a timed out file, relative to --file-timeout")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default=LOG_INFO,
+                        help="Lowest level of messages to print, debug adds per file details")
+    args = parser.parse_args(argv)
+    args.exclude_dir = [d for value in args.exclude_dir for d in value.split(",") if d]
+    try:
+        args.results = [parse_sink(v) for value in args.results for v in value.split(",") if v]
+    except ValueError as e:
+        parser.error(str(e))
+    if args.shard_count < 1 or not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be from 0 to --shard-count - 1")
+    return args
 
 def main():
-    Log.debug("Starting Script")
-    args = sys.argv[1:]
-    Log.debug("Arguments: " + str(args))
+    args = parse_args(sys.argv[1:])
+    configure_logging(args.log_level)
+    log.debug("Starting Script")
+    log.debug("Arguments: %s", args)
 
-    validate_github_volume(args[1])
+    validate_github_volume(args.volume)
 
     gw_lib_dir = "/home/glasswall/"
     os.curdir = gw_lib_dir
-    items = os.listdir(gw_lib_dir)
-    Log.debug("In Directory: " + os.curdir)
-    Log.debug(str(items))
-    gw = Glasswall(os.path.join( gw_lib_dir, "libglasswall.classic.so"))
-    Log.debug("Loaded GW Rebuild Library")
-
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("In Directory: %s", os.curdir)
+        log.debug("%s", os.listdir(gw_lib_dir))
 
     #  GWFileConfigXML Test
     configFile = open("/home/glasswall/config.xml", "r")
     xmlContent = configFile.read()
     configFile.close()
 
-    # Apply the content management configuration
-    configXMLResult = gw.GWFileConfigXML(xmlContent)
-
-    if configXMLResult.returnStatus != 1:
-        Log.warn("Failed to apply the content management configuration for the following reason: " + gw.GWFileErrorMsg())
+    workers = args.workers or usable_cpus()
+    cache_max_bytes = args.cache_size * 1024 * 1024
+    pool = RebuildPool(os.path.join(gw_lib_dir, "libglasswall.classic.so"), xmlContent, workers,
+                       cacheDir=args.cache_dir, cacheMaxBytes=cache_max_bytes, ingest=args.ingest,
+                       routeByHeader=args.route_by_header, resetFiles=args.reset_files,
+                       memoryLimit=args.memory_limit * 1024 * 1024, maxTasksPerWorker=args.max_tasks_per_worker,
+                       fileTimeout=args.file_timeout, retryTimeoutFactor=args.retry_timeout_factor,
+                       # Prefetching would queue the next largest files behind the largest on one worker
+                       tasksPerWorker=1 if args.schedule == SCHEDULE_LONGEST_FIRST else None,
+                       fileToFileSize=int(args.file_to_file_size * 1024 * 1024),
+                       outputDir=args.output_dir, root=args.volume)
+
+    # Each worker loads the library and applies the content management configuration once
+    try:
+        pool.start()
+    except RebuildWorkerError as e:
+        log.warning("%s", e)
         return
-    Log.debug("XML Config Loaded")
+    log.debug("Loaded GW Rebuild Library and XML Config in %d workers", workers)
     #  GWFileConfigXML Test
 
-    #Get files with ARG filetype
-    files_to_rebuild = [os.path.join(dp, f) for dp, dn, filenames in os.walk(args[1]) for f in filenames if args[3] in f]
-    
-    #Log.info("Files to Rebuild")
-    #Log.info(str(files_to_rebuild))
+    #Get files with ARG filetype, they are handed to the workers as they are found
+    # When routing by header every file is a candidate, whatever its name
+    extension = None if args.route_by_header else normalise_extension(args.filetype)
+    changed = changed_files(args.volume, args.base_ref) if args.base_ref else None
+    if changed is not None:
+        log.info("Incremental scan: %d files changed since %s", len(changed), args.base_ref)
+        files_to_rebuild = select_files(changed, args.volume, extension, args.exclude_dir)
+    else:
+        if args.base_ref:
+            log.warning("Cannot diff against %s, falling back to a full scan", args.base_ref)
+        # Every shard must keep the same one of several links to a file, whatever order its runner lists them in
+        files_to_rebuild = discover_files(args.volume, extension, args.exclude_dir, ordered=args.shard_count > 1)
+
+    #log.info("Files to Rebuild")
+    #log.info(str(files_to_rebuild))
+    # An output tree inside the scanned tree is not scanned itself
+    if args.output_dir:
+        output_prefix = os.path.join(os.path.abspath(args.output_dir), "")
+        files_to_rebuild = (f for f in files_to_rebuild if not os.path.abspath(f).startswith(output_prefix))
+
+    stats = RunStats()
+    files_to_rebuild = timed(files_to_rebuild, stats, PHASE_DISCOVERY)
+
+    # Every job of a matrix discovers the same files and computes the same split
+    if args.shard_count > 1:
+        candidates = list(files_to_rebuild)
+        files_to_rebuild, shard_bytes, total_bytes = shard_files(candidates, args.volume, args.shard_index, args.shard_count)
+        log.info("Shard %d of %d: %d of %d files, %.1f of %.1f MB", args.shard_index, args.shard_count,
+                 len(files_to_rebuild), len(candidates), shard_bytes / 1e6, total_bytes / 1e6)
+
+    # Identical files are found by size, then by hash, once discovery has finished
+    deduplicator = None
+    if args.dedupe:
+        deduplicator = Deduplicator()
+        files_to_rebuild = deduplicator.unique(files_to_rebuild)
+
+    # Processing times are predicted from earlier runs kept in the cache directory, or by size
+    cost_model = None
+    predicted_ns = None
+    if args.schedule == SCHEDULE_LONGEST_FIRST:
+        cost_model = CostModel(os.path.join(args.cache_dir, COST_MODEL_FILE) if args.cache_dir else None)
+        files_to_rebuild, predicted_ns = longest_first(files_to_rebuild, args.filetype, cost_model, workers)
 
     report1_h = "File"
     report2_h = "Status Code"
     report3_h = "Microseconds"
     report4_h = "Buffer Size Returned"
-    Log.info("| "+report1_h.ljust(50)+"|"+ report2_h.rjust(15)+"|"+report3_h.rjust(15)+"|"+report4_h.rjust(25)+"|")
-    for f in files_to_rebuild:
-        a = datetime.datetime.now()
-        protected_f = gw.GWFileProtect(f, args[3])
-        b = datetime.datetime.now()
-        delta = b - a
-
-        if protected_f.returnStatus == 1:
-            Log.info("| "+f.ljust(50)+"|"+ str(protected_f.returnStatus).rjust(15)+"|" + str(delta.microseconds).rjust(15)+"|"+ str(len(protected_f.fileBuffer)).rjust(25)+"|")
+    log.info("| %s|%s|%s|%s|", report1_h.ljust(50), report2_h.rjust(15), report3_h.rjust(15), report4_h.rjust(25))
+    cache_hits = 0
+    files_processed = 0
+    files_skipped = 0
+    engine_resets = 0
+    files_timed_out = 0
+    files_crashed = 0
+    files_retried = 0
+    worker_peak_rss = {}
+    sinks = [open_sink(sink_format, path, args.volume) for sink_format, path in args.results]
+    # Rebuilt files are written on their own thread while the workers carry on
+    writer = None
+    if args.output_dir:
+        writer = OutputWriter(args.output_dir, args.volume, args.fsync)
+        writer.start()
+        if writer.staleTemps:
+            log.info("Removed %d temporary files left in %s by an earlier run", writer.staleTemps, args.output_dir)
+    dispatch_start = last_result = now_ns()
+    try:
+        results = pool.imap_unordered(RebuildTask(f, args.filetype) for f in files_to_rebuild)
+        if deduplicator is not None:
+            results = (r for result in results for r in deduplicator.fan_out(result))
+        for protected_f in results:
+            f = protected_f.path
+            report_start = last_result = now_ns()
+            for sink in sinks:
+                sink.write(protected_f)
+            if writer is not None:
+                writer.submit(protected_f)
+            worker_peak_rss[protected_f.workerId] = max(worker_peak_rss.get(protected_f.workerId, 0), protected_f.peakRss)
+            if protected_f.reset:
+                engine_resets += 1
+            if protected_f.retried:
+                files_retried += 1
+            if protected_f.timedOut:
+                files_timed_out += 1
+            if protected_f.crashed:
+                files_crashed += 1
+            if protected_f.skipped:
+                files_skipped += 1
+                log.debug("%s skipped, detected file type: %s", f, protected_f.detectedType)
+                continue
+            files_processed += 1
+            if protected_f.cached:
+                cache_hits += 1
+            if protected_f.duplicateOf is not None:
+                log.debug("%s has the same content as %s", f, protected_f.duplicateOf)
+            else:
+                log.debug("%s ingested by %s, phase timings (ns): %s", f, protected_f.ingest, protected_f.timings)
+                stats.add_file(protected_f.fileType, protected_f.inputSize, protected_f.timings, protected_f.output)
+                if cost_model is not None and not protected_f.cached and protected_f.timings:
+                    cost_model.add(protected_f.fileType, protected_f.inputSize, sum(protected_f.timings.values()))
+
+            level = logging.INFO if protected_f.returnStatus == 1 else logging.WARNING
+            log.log(level, "| %-50s|%15d|%15d|%25d|",
+                    f, protected_f.returnStatus, protected_f.microseconds, protected_f.bufferSize)
+            stats.add(PHASE_REPORT, now_ns() - report_start)
+    finally:
+        pool.close()
+        if writer is not None:
+            writer.close()
+        for sink in sinks:
+            sink.close()
+
+    if log.isEnabledFor(logging.INFO):
+        for line in stats.summary_lines():
+            log.info("%s", line)
+
+    if worker_peak_rss:
+        log.info("Worker memory: peak RSS %.1f MB, %d engine resets, %d worker restarts",
+                 max(worker_peak_rss.values()) / 1e6, engine_resets, pool.restarts)
+        for worker_id, peak_rss in sorted(worker_peak_rss.items()):
+            log.debug("Worker %d peak RSS %.1f MB", worker_id, peak_rss / 1e6)
+
+    if cost_model is not None:
+        cost_model.save()
+        if predicted_ns is not None:
+            log.info("Schedule: longest first over %d workers, predicted makespan %.2fs, actual %.2fs",
+                     workers, predicted_ns / 1e9, (last_result - dispatch_start) / 1e9)
         else:
-            Log.warn("| "+f.ljust(50)+"|"+ str(protected_f.returnStatus).rjust(15)+"|" + str(delta.microseconds).rjust(15)+"|"+ str(len(protected_f.fileBuffer)).rjust(25)+"|")
+            log.info("Schedule: largest first over %d workers, actual makespan %.2fs, no earlier timings to predict from",
+                     workers, (last_result - dispatch_start) / 1e9)
+
+    if deduplicator is not None:
+        log.info("De-duplication: %d engine calls saved, %d files hashed",
+                 deduplicator.saved, deduplicator.filesHashed)
+
+    if writer is not None:
+        log.info("Output tree: %d rebuilt files, %.1f MB written to %s, %d failed",
+                 writer.files, writer.bytes / 1e6, args.output_dir, len(writer.errors))
+        for path, message in writer.errors:
+            log.warning("Failed to write %s: %s", path, message)
+
+    if args.file_timeout:
+        log.info("Timeouts: %d workers killed after running past %gs, %d files timed out again",
+                 pool.timeouts, args.file_timeout, files_timed_out)
+
+    if files_retried:
+        log.info("Retries: %d files retried in a fresh worker after a timeout or crash", files_retried)
+    if files_crashed:
+        log.warning("Crashes: %d files ended their worker twice and were not rebuilt", files_crashed)
+
+    if args.route_by_header:
+        log.info("Header routing: %d files skipped as unrecognised or of another file type", files_skipped)
+
+    if args.cache_dir:
+        cache = ResultCache(args.cache_dir, cache_max_bytes)
+        evicted = cache.evict()
+        cache.close()
+        if args.route_by_header:
+            file_types = FileTypeCache(args.cache_dir)
+            file_types.prune()
+            file_types.close()
+        log.info("Result cache: %d of %d files unchanged, %d entries evicted", cache_hits, files_processed, evicted)
 
 
-    Log.debug("Ending Script")
+    log.debug("Ending Script")
 
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
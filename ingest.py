@@ -0,0 +1,46 @@
+import os
+import mmap
+import stat
+
+# Pass file paths to GWFileProtect and let the engine read the file
+INGEST_PATH = "path"
+# Memory map each file and pass the mapping to GWMemoryToMemoryProtect
+INGEST_MMAP = "mmap"
+
+INGEST_MODES = (INGEST_PATH, INGEST_MMAP)
+
+
+def map_file(path):
+    """Memory maps a file for reading and advises the kernel to read it ahead.
+
+    The mapping shares the page cache, so a file that is already cached is not read
+    again, and the read-ahead started here overlaps with other work until the engine
+    touches the pages.
+
+    :param str path: The file path to map.
+    :return: A read-only mapping of the whole file, or None when the file cannot be
+        mapped, such as empty files, special files or files that cannot be opened.
+    :rtype: mmap.mmap or None
+    """
+
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+
+    try:
+        st = os.fstat(fd)
+        if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+            return None
+        mapped = mmap.mmap(fd, st.st_size, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    finally:
+        os.close(fd)
+
+    # madvise is available from Python 3.8
+    if hasattr(mapped, "madvise"):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+        mapped.madvise(mmap.MADV_WILLNEED)
+
+    return mapped
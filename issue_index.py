@@ -0,0 +1,140 @@
+import os
+import re
+import json
+import bisect
+import tempfile
+import xml.etree.ElementTree as ET
+
+
+def _local_name(tag):
+    return tag.rpartition("}")[2].lower()
+
+
+def parse_id_info(xmlText):
+    """Reads the Issue ID ranges from the XML returned by GWGetAllIdInfo.
+
+    Every element with children naming the start and end of a range, and a description,
+    such as <IdStart>, <IdEnd> and <Description>, gives one range. Elements with a single
+    ID child in place of the start and end give a range of one ID.
+
+    :param str xmlText: The XML returned by GWGetAllIdInfo.
+    :return: A list of (start, end, description) tuples.
+    :rtype: list
+    """
+
+    ranges = []
+    for element in ET.fromstring(xmlText).iter():
+        start = end = description = None
+        for child in element:
+            name = _local_name(child.tag)
+            text = (child.text or "").strip()
+            if "desc" in name:
+                description = text
+            elif "start" in name:
+                start = text
+            elif "end" in name:
+                end = text
+            elif name in ("id", "issueid"):
+                start = end = text
+        if start is None or end is None or description is None:
+            continue
+        try:
+            ranges.append((int(start, 0), int(end, 0), description))
+        except ValueError:
+            continue
+    return ranges
+
+
+class IssueIndex:
+    """Answers Issue ID group lookups with a binary search over sorted, disjoint ranges.
+
+    Where ranges nest or overlap, an ID belongs to the range starting closest below it.
+    """
+
+    def __init__(self, ranges):
+        """Builds the index.
+
+        :param list ranges: (start, end, description) tuples, in any order.
+        """
+
+        self.starts = []
+        self.ends = []
+        self.descriptions = []
+
+        # Split the ranges at every boundary and give each piece to the innermost range covering it
+        boundaries = sorted(set([start for start, _, _ in ranges] + [end + 1 for _, end, _ in ranges]))
+        for low, high in zip(boundaries, boundaries[1:]):
+            covering = [r for r in ranges if r[0] <= low and high - 1 <= r[1]]
+            if not covering:
+                continue
+            description = max(covering, key=lambda r: (r[0], -r[1]))[2]
+            if self.ends and self.ends[-1] == low - 1 and self.descriptions[-1] == description:
+                self.ends[-1] = high - 1
+            else:
+                self.starts.append(low)
+                self.ends.append(high - 1)
+                self.descriptions.append(description)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def lookup(self, issueId):
+        """Returns the group description of an Issue ID.
+
+        :param int issueId: The Issue ID to lookup.
+        :return: The description, or None if no range holds the ID.
+        :rtype: str or None
+        """
+
+        i = bisect.bisect_right(self.starts, issueId) - 1
+        if i < 0 or issueId > self.ends[i]:
+            return None
+        return self.descriptions[i]
+
+    def ranges(self):
+        """Returns the disjoint ranges of the index as (start, end, description) tuples."""
+
+        return list(zip(self.starts, self.ends, self.descriptions))
+
+
+def _index_path(cacheDir, version):
+    return os.path.join(cacheDir, "issue_index-" + re.sub(r"[^A-Za-z0-9._-]", "_", version) + ".json")
+
+
+def load_issue_index(gw, cacheDir=None):
+    """Returns the Issue ID index of a Glasswall library.
+
+    The index is built from GWGetAllIdInfo and, when given a cache directory, saved there
+    under the library version, so later runs with the same version make no engine call
+    beyond GWFileVersion.
+
+    :param Glasswall.Glasswall gw: The Glasswall library.
+    :param str cacheDir: An optional directory to keep the index in.
+    :rtype: IssueIndex
+    :raises Exception: If the Issue ID information could not be retrieved.
+    """
+
+    path = None
+    if cacheDir:
+        path = _index_path(cacheDir, gw.GWFileVersion().text)
+        try:
+            with open(path) as f:
+                return IssueIndex([tuple(r) for r in json.load(f)])
+        except (OSError, ValueError, TypeError):
+            pass
+
+    idInfo = gw.GWGetAllIdInfo()
+    if idInfo.returnStatus != 1:
+        raise Exception("Failed to retrieve the Issue ID information. " + gw.GWFileErrorMsg().text)
+    index = IssueIndex(parse_id_info(idInfo.string))
+
+    if path is not None:
+        if not os.path.isdir(cacheDir):
+            os.makedirs(cacheDir)
+        # Written aside and renamed, so concurrent runs never read a partial index
+        fd, tempPath = tempfile.mkstemp(dir=cacheDir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(index.ranges(), f)
+        os.replace(tempPath, path)
+
+    return index
@@ -0,0 +1,83 @@
+"""Merges the JSONL results of the shards of a scan into one report.
+
+Each matrix job of a sharded scan writes its own JSONL results. Once every job has
+finished, the files are combined, sorted by path, into any of the result formats:
+
+    python merge_results.py --results junit:rebuild.xml,sarif:rebuild.sarif shard-*.jsonl
+"""
+
+import sys
+import json
+import argparse
+
+from rebuild_pool import RebuildResult
+from result_sinks import SINK_FORMATS, parse_sink, open_sink
+
+
+def record_result(record):
+    """Returns the result a record was written for, the reverse of result_sinks.result_record().
+
+    :param dict record: A record read from a JSONL results file.
+    :rtype: rebuild_pool.RebuildResult
+    """
+
+    result = RebuildResult()
+    result.path = record["path"]
+    result.fileType = record.get("fileType")
+    result.detectedType = record.get("detectedType")
+    result.returnStatus = record.get("returnStatus", 0)
+    result.timings = record.get("timings") or {}
+    result.microseconds = sum(result.timings.values()) // 1000
+    result.bufferSize = record.get("outputSize", 0)
+    result.message = record.get("message")
+    result.configFingerprint = record.get("configFingerprint")
+    for name in ("cached", "skipped", "timedOut", "crashed", "retried", "output", "duplicateOf"):
+        if name in record:
+            setattr(result, name, record[name])
+    return result
+
+
+def read_results(paths):
+    """Reads the records of JSONL results files.
+
+    :param list paths: The files to read.
+    :return: The results of every file, sorted by path.
+    :rtype: list
+    """
+
+    results = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    results.append(record_result(json.loads(line)))
+    results.sort(key=lambda result: result.path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge the JSONL results of sharded scans")
+    parser.add_argument("inputs", nargs="+", help="JSONL results files written with --results jsonl:PATH")
+    parser.add_argument("--results", action="append", required=True,
+                        help="Write the merged records as FORMAT:PATH, FORMAT one of " + ", ".join(SINK_FORMATS)
+                             + ", comma separated or repeated")
+    args = parser.parse_args(sys.argv[1:])
+    try:
+        sinks = [parse_sink(v) for value in args.results for v in value.split(",") if v]
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = read_results(args.inputs)
+
+    # Paths in the records are already relative to the scanned directory
+    for sinkFormat, path in sinks:
+        with open_sink(sinkFormat, path, ".") as sink:
+            for result in results:
+                sink.write(result)
+
+    failed = sum(1 for result in results if not result.skipped and result.returnStatus != 1)
+    print("Merged {0} results from {1} files, {2} not rebuilt".format(len(results), len(args.inputs), failed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import os
+import re
+import queue
+import shutil
+import tempfile
+import threading
+
+# When rebuilt files are flushed to disk: never explicitly, each file before it is renamed
+# into place, each file and then each directory once the files of a batch are renamed into
+# it, or everything at the end
+FSYNC_NONE = "none"
+FSYNC_FILE = "file"
+FSYNC_DIR = "dir"
+FSYNC_END = "end"
+FSYNC_POLICIES = (FSYNC_NONE, FSYNC_FILE, FSYNC_DIR, FSYNC_END)
+
+# Rebuilt files waiting for the writer thread before the caller blocks, bounding the memory they hold
+MAX_PENDING = 64
+
+# Temporary files are created private, rebuilt files get the permissions of any new file
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Temporary files made by temp_path() and the writer, ".<name>.<random>.tmp"
+_TEMP_NAME = re.compile(r"^\..+\.[A-Za-z0-9_]{8}\.tmp$")
+
+
+def mirror_path(outputDir, root, path):
+    """Returns where the rebuilt copy of a file goes in an output tree mirroring the input tree.
+
+    :param str outputDir: The root of the output tree.
+    :param str root: The root of the input tree.
+    :param str path: The path of the input file, under root.
+    :rtype: str
+    """
+
+    return os.path.join(outputDir, os.path.relpath(path, root))
+
+
+def temp_path(target):
+    """Creates an empty temporary file beside a target file, creating its directory if needed.
+
+    The file is hidden and named after the target, so one left behind by a killed worker
+    is easily recognised.
+
+    :param str target: The path the temporary file will be renamed to.
+    :return: The path of the temporary file.
+    :rtype: str
+    """
+
+    directory, name = os.path.split(target)
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, prefix="." + name + ".", suffix=".tmp")
+    os.close(fd)
+    return path
+
+
+def _fsync_path(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def remove_stale_temps(outputDir):
+    """Removes the temporary files left in an output tree by a run that was killed.
+
+    :param str outputDir: The root of the output tree.
+    :return: The number of files removed.
+    :rtype: int
+    """
+
+    removed = 0
+    for directory, _, names in os.walk(outputDir):
+        for name in names:
+            if _TEMP_NAME.match(name):
+                _remove(os.path.join(directory, name))
+                removed += 1
+    return removed
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class OutputWriter:
+    """Writes rebuilt files into an output tree mirroring the input tree on a background thread.
+
+    Every file is written to a temporary file in its target directory and renamed into
+    place, so the tree never holds a partially written file. Files submitted while the
+    thread is busy are written together as a batch, creating the directories the batch
+    needs, and syncing them under FSYNC_DIR, once.
+    """
+
+    def __init__(self, outputDir, root, fsync=FSYNC_NONE, maxPending=MAX_PENDING):
+        """Constructor for the writer. Call start() before submitting files.
+
+        :param str outputDir: The root of the output tree.
+        :param str root: The root of the input tree.
+        :param str fsync: When written files are flushed to disk, one of FSYNC_POLICIES.
+        :param int maxPending: The most files waiting to be written before submit() blocks.
+        """
+
+        self.outputDir = outputDir
+        self.root = root
+        self.fsync = fsync
+        self.files = 0
+        self.bytes = 0
+        # (path, message) of every file that could not be written
+        self.errors = []
+        # Temporary files of an earlier run removed by start()
+        self.staleTemps = 0
+
+        self._syncFiles = fsync in (FSYNC_FILE, FSYNC_DIR)
+        self._queue = queue.Queue(maxPending)
+        self._thread = threading.Thread(target=self._run, name="output-writer", daemon=True)
+        # Directories known to exist
+        self._dirs = set()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self):
+        """Removes the temporary files of an earlier run and starts the writer thread.
+
+        Call it before the workers write any temporary file of their own.
+        """
+
+        self.staleTemps = remove_stale_temps(self.outputDir)
+        self._thread.start()
+
+    def submit(self, result):
+        """Queues the rebuilt file of a result for writing.
+
+        Results without a rebuilt file, such as files the engine could not protect, are ignored.
+
+        :param rebuild_pool.RebuildResult result: The result holding the rebuilt file, either
+            in outputData, in the temporary file outputTemp, or as the rebuilt file of the
+            input file outputSource, submitted before it.
+        """
+
+        if result.outputData is None and result.outputTemp is None and result.outputSource is None:
+            return
+        self._queue.put((result.path, result.outputData, result.outputTemp, result.outputSource))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Take whatever else is already waiting
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            items = [item for item in batch if item is not None]
+            try:
+                self._write_batch(items)
+            except Exception as e:
+                # The thread must keep draining the queue, or submit() would block forever
+                self.errors.extend((path, "Unexpected error: {0}".format(e)) for path, _, _, _ in items)
+            if None in batch:
+                break
+
+    def _write_batch(self, batch):
+        targets = [
+            (mirror_path(self.outputDir, self.root, path), data, tempPath, source)
+            for path, data, tempPath, source in batch
+        ]
+
+        for directory in sorted(set(os.path.dirname(target[0]) for target in targets) - self._dirs):
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError:
+                # Reported against the files that cannot be written into it
+                continue
+            self._dirs.add(directory)
+
+        written = set()
+        for target, data, tempPath, source in targets:
+            try:
+                if source is not None:
+                    # A copy of a file renamed into place earlier
+                    tempPath = self._write_temp(target, None, mirror_path(self.outputDir, self.root, source))
+                    size = os.path.getsize(tempPath)
+                elif tempPath is None:
+                    tempPath = self._write_temp(target, data)
+                    size = len(data)
+                else:
+                    # Written by the engine in a worker
+                    if self._syncFiles:
+                        _fsync_path(tempPath)
+                    size = os.path.getsize(tempPath)
+                os.chmod(tempPath, 0o666 & ~_UMASK)
+                os.replace(tempPath, target)
+            except Exception as e:
+                if tempPath is not None:
+                    _remove(tempPath)
+                self.errors.append((target, str(e)))
+                continue
+            self.files += 1
+            self.bytes += size
+            written.add(os.path.dirname(target))
+
+        if self.fsync == FSYNC_DIR:
+            for directory in written:
+                try:
+                    _fsync_path(directory)
+                except OSError as e:
+                    self.errors.append((directory, str(e)))
+
+    def _write_temp(self, target, data, source=None):
+        directory, name = os.path.split(target)
+        fd, tempPath = tempfile.mkstemp(dir=directory, prefix="." + name + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if source is not None:
+                    with open(source, "rb") as s:
+                        shutil.copyfileobj(s, f)
+                else:
+                    f.write(data)
+                if self._syncFiles:
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError:
+            _remove(tempPath)
+            raise
+        return tempPath
+
+    def close(self):
+        """Waits for every submitted file to be written and stops the writer thread."""
+
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self.fsync == FSYNC_END and self.files:
+            os.sync()
@@ -0,0 +1,291 @@
+"""A thin client for the rebuild daemon, see rebuild_daemon.py.
+
+Imports nothing beyond the standard library, so it starts in milliseconds:
+
+    python rebuild_client.py protect -f pdf report.pdf invoice.pdf
+    python rebuild_client.py audit -f docx letter.docx --report-dir reports
+    python rebuild_client.py determine-type unknown.bin
+
+Each file is answered with a JSON line on standard output. Requests for several files are
+pipelined over one connection, so the daemon's workers process them in parallel.
+"""
+
+import os
+import sys
+import json
+import socket
+import struct
+import argparse
+import tempfile
+
+
+
+def default_socket_dir():
+    """Returns the private directory holding the daemon's socket by default: the user's
+    runtime directory when there is one, otherwise a directory of the user's own in the
+    temporary directory, which the daemon creates readable by the user only.
+
+    :rtype: str
+    """
+
+    runtimeDir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtimeDir and os.path.isdir(runtimeDir):
+        return runtimeDir
+    return os.path.join(tempfile.gettempdir(), "glasswall-rebuild-{0}".format(os.getuid()))
+
+
+DEFAULT_SOCKET = os.path.join(default_socket_dir(), "glasswall-rebuild.sock")
+
+JOB_PROTECT = "protect"
+JOB_AUDIT = "audit"
+JOB_DETERMINE_TYPE = "determine-type"
+JOB_VERSION = "version"
+JOBS = (JOB_PROTECT, JOB_AUDIT, JOB_DETERMINE_TYPE, JOB_VERSION)
+
+# Every frame starts with the sizes of its JSON header and of the binary payload that follows it
+FRAME_PREFIX = struct.Struct(">II")
+MAX_HEADER_SIZE = 1 << 20
+
+# Requests sent ahead of their responses by run_many()
+PIPELINE_DEPTH = 32
+
+
+class RebuildDaemonError(Exception):
+    """Raised when the daemon cannot be reached, closes the connection or sends a malformed frame."""
+
+
+def encode_header(header, payloadSize=0):
+    """Returns the start of a frame, its prefix and JSON header, to be followed by the payload.
+
+    :param dict header: The header.
+    :param int payloadSize: The size of the payload in bytes.
+    :rtype: bytes
+    """
+
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return FRAME_PREFIX.pack(len(encoded), payloadSize) + encoded
+
+
+def decode_header(encoded):
+    """Returns the header of a frame.
+
+    :param bytes encoded: The JSON header.
+    :rtype: dict
+    :raises RebuildDaemonError: If the header is not a JSON object.
+    """
+
+    try:
+        header = json.loads(encoded.decode("utf-8"))
+    except ValueError as e:
+        raise RebuildDaemonError("Malformed frame header: {0}".format(e))
+    if not isinstance(header, dict):
+        raise RebuildDaemonError("Malformed frame header: not an object")
+    return header
+
+
+def mirrored_names(paths):
+    """Returns a name for each file, its path relative to the deepest directory holding all
+    of them, so files of the same name in different directories are kept apart.
+
+    :param list paths: The files.
+    :return: The relative name of each absolute path.
+    :rtype: dict
+    """
+
+    absolute = [os.path.abspath(path) for path in paths]
+    if not absolute:
+        return {}
+    common = os.path.commonpath([os.path.dirname(path) for path in absolute])
+    return dict((path, os.path.relpath(path, common)) for path in absolute)
+
+
+def _recv_exactly(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if not n:
+            raise RebuildDaemonError("The daemon closed the connection")
+        received += n
+    return buffer
+
+
+class RebuildClient:
+    """A connection to the rebuild daemon.
+
+    Paths are sent as absolute paths and read by the daemon's workers, so no file content
+    passes through the socket unless a buffer is given or the output is requested.
+    """
+
+    def __init__(self, socketPath=DEFAULT_SOCKET, timeout=None):
+        """Connects to the daemon.
+
+        :param str socketPath: The daemon's Unix domain socket.
+        :param float timeout: Seconds the daemon may spend on each request, defaults to its own timeout.
+        :raises RebuildDaemonError: If the daemon is not running.
+        """
+
+        self.timeout = timeout
+        self._nextId = 0
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.connect(socketPath)
+        except OSError as e:
+            self.sock.close()
+            raise RebuildDaemonError("Cannot connect to the rebuild daemon at {0}: {1}".format(socketPath, e))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.sock.close()
+
+    def _send(self, job, payload=b"", **fields):
+        self._nextId += 1
+        header = dict(fields, id=self._nextId, job=job)
+        if self.timeout is not None:
+            header["timeout"] = self.timeout
+        self.sock.sendall(encode_header(header, len(payload)))
+        if payload:
+            self.sock.sendall(payload)
+        return self._nextId
+
+    def _receive(self):
+        headerSize, payloadSize = FRAME_PREFIX.unpack(_recv_exactly(self.sock, FRAME_PREFIX.size))
+        if headerSize > MAX_HEADER_SIZE:
+            raise RebuildDaemonError("Frame header of {0} bytes is too large".format(headerSize))
+        header = decode_header(bytes(_recv_exactly(self.sock, headerSize)))
+        payload = _recv_exactly(self.sock, payloadSize) if payloadSize else bytearray()
+        return header, payload
+
+    def request(self, job, payload=b"", **fields):
+        """Runs a job in the daemon and waits for its response.
+
+        :param str job: One of JOBS.
+        :param payload: An optional file content to process instead of a path.
+        :param fields: The fields of the job, such as path and fileType.
+        :return: The response header and payload. Requests the daemon could not run, such as
+            files that timed out, have ok set to false and an error.
+        :rtype: tuple
+        """
+
+        self._send(job, payload, **fields)
+        return self._receive()
+
+    def run_many(self, requests, depth=PIPELINE_DEPTH):
+        """Runs many jobs, keeping up to depth of them in flight, and yields their responses as
+        they complete.
+
+        :param iterable requests: (job, fields) pairs.
+        :param int depth: The most requests sent ahead of their responses.
+        :return: A generator of (fields, header, payload) tuples.
+        """
+
+        pending = {}
+        for job, fields in requests:
+            if len(pending) >= depth:
+                header, payload = self._receive()
+                yield (pending.pop(header.get("id")), header, payload)
+            pending[self._send(job, **fields)] = fields
+
+        while pending:
+            header, payload = self._receive()
+            yield (pending.pop(header.get("id")), header, payload)
+
+    def protect(self, path, fileType, outputPath=None, returnFile=False):
+        """Protects a file, writing the protected file to outputPath, or returning it when returnFile is set.
+
+        :rtype: tuple
+        """
+
+        return self.request(JOB_PROTECT, path=os.path.abspath(path), fileType=fileType,
+                            output=os.path.abspath(outputPath) if outputPath else None, returnBuffer=returnFile)
+
+    def protect_buffer(self, buffer, fileType):
+        """Protects the content of a buffer and returns the protected file.
+
+        :rtype: tuple
+        """
+
+        return self.request(JOB_PROTECT, buffer, fileType=fileType, returnBuffer=True)
+
+    def audit(self, path, fileType):
+        """Analyses a file and returns the XML analysis report.
+
+        :rtype: tuple
+        """
+
+        return self.request(JOB_AUDIT, path=os.path.abspath(path), fileType=fileType, returnBuffer=True)
+
+    def determine_type(self, path):
+        """Returns the file type determined by the engine in the fileType field of the response.
+
+        :rtype: tuple
+        """
+
+        return self.request(JOB_DETERMINE_TYPE, path=os.path.abspath(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run jobs in the Glasswall rebuild daemon")
+    parser.add_argument("job", choices=JOBS)
+    parser.add_argument("files", nargs="*", help="Files to process")
+    parser.add_argument("-f", "--filetype", help="File type to process the files as")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="The daemon's Unix domain socket")
+    parser.add_argument("--timeout", type=float, help="Seconds the daemon may spend on each file")
+    parser.add_argument("--output-dir", help="Write protected files to this directory")
+    parser.add_argument("--report-dir", help="Write analysis reports to this directory")
+    # Options may come after the files
+    args = parser.parse_intermixed_args(sys.argv[1:])
+    if args.job in (JOB_PROTECT, JOB_AUDIT) and not args.filetype:
+        parser.error("-f/--filetype is required for " + args.job)
+
+    # Outputs mirror the tree the files were given from, so files of the same name never overwrite each other
+    names = mirrored_names(args.files)
+
+    def fields(path):
+        result = {"path": os.path.abspath(path)}
+        if args.job != JOB_DETERMINE_TYPE:
+            result["fileType"] = args.filetype
+        if args.job == JOB_PROTECT and args.output_dir:
+            result["output"] = os.path.abspath(os.path.join(args.output_dir, names[result["path"]]))
+            os.makedirs(os.path.dirname(result["output"]), exist_ok=True)
+        if args.job == JOB_AUDIT:
+            result["returnBuffer"] = bool(args.report_dir)
+        return result
+
+    try:
+        with RebuildClient(args.socket, args.timeout) as client:
+            if args.job == JOB_VERSION:
+                header, _ = client.request(JOB_VERSION)
+                print(json.dumps(header, sort_keys=True))
+                return
+
+            failed = 0
+            if args.output_dir and not os.path.isdir(args.output_dir):
+                os.makedirs(args.output_dir)
+            if args.report_dir and not os.path.isdir(args.report_dir):
+                os.makedirs(args.report_dir)
+            for request, header, payload in client.run_many((args.job, fields(path)) for path in args.files):
+                if args.job == JOB_AUDIT and args.report_dir and payload:
+                    reportPath = os.path.join(args.report_dir, names[request["path"]] + ".xml")
+                    os.makedirs(os.path.dirname(reportPath), exist_ok=True)
+                    with open(reportPath, "wb") as f:
+                        f.write(payload)
+                if not header.get("ok") or header.get("returnStatus", 1) != 1:
+                    failed += 1
+                header["path"] = request["path"]
+                print(json.dumps(header, sort_keys=True))
+    except RebuildDaemonError as e:
+        sys.exit(str(e))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""Keeps Glasswall workers warm behind a Unix domain socket.
+
+Each worker loads the library and applies the configuration once, when the daemon starts,
+so a job costs only the engine call and a round trip over the socket:
+
+    python rebuild_daemon.py [--socket PATH] [-w WORKERS] [--timeout SECONDS]
+
+Jobs are sent with rebuild_client.py. Every request and response is a frame holding the
+sizes of a JSON header and of a binary payload, then the header, then the payload. A
+request names its job and carries an id echoed in its response. Requests on one
+connection run concurrently, and their responses are sent as they complete.
+"""
+
+import os
+import sys
+import stat
+import signal
+import socket
+import asyncio
+import argparse
+import tempfile
+
+from async_glasswall import AsyncGlasswall, AsyncGlasswallError
+from file_types import file_type_name
+from run_log import LOG_LEVELS, LOG_INFO, log, configure_logging
+from rebuild_client import (DEFAULT_SOCKET, JOB_PROTECT, JOB_AUDIT, JOB_DETERMINE_TYPE, JOB_VERSION,
+                            FRAME_PREFIX, MAX_HEADER_SIZE, RebuildDaemonError, encode_header, decode_header)
+
+DEFAULT_LIBRARY = "/home/glasswall/libglasswall.classic.so"
+DEFAULT_CONFIG = "/home/glasswall/config.xml"
+
+# Functions of the library the daemon does not start without, those of the protect job and
+# of every response
+REQUIRED_FUNCTIONS = ("GWFileConfigXML", "GWFileProtect", "GWMemoryToMemoryProtect", "GWFileToFileProtect",
+                      "GWFileProcessMsg", "GWFileErrorMsg")
+
+
+def _outcome(gw, result, request, buffer=None):
+    """Returns the response to a protect or audit job, with the output buffer as its payload
+    when the request asks for it.
+    """
+
+    if result.returnStatus == 1:
+        message = gw.GWFileProcessMsg().text
+    else:
+        message = gw.GWFileErrorMsg().text
+
+    response = {"returnStatus": result.returnStatus, "message": message}
+    payload = b""
+    if buffer is not None:
+        response["size"] = len(buffer)
+        if request.get("returnBuffer"):
+            payload = bytes(buffer)
+    elif request.get("output") and os.path.exists(request["output"]):
+        response["size"] = os.path.getsize(request["output"])
+    return response, payload
+
+
+def _protect_job(gw, request, payload):
+    """Protects the file at path, or the payload, to memory or to the output path."""
+
+    fileType = request["fileType"]
+    if payload:
+        result = gw.GWMemoryToMemoryProtect(payload, fileType)
+    elif request.get("output"):
+        return _outcome(gw, gw.GWFileToFileProtect(request["path"], fileType, request["output"]), request)
+    else:
+        result = gw.GWFileProtect(request["path"], fileType)
+    return _outcome(gw, result, request, result.fileBuffer)
+
+
+def _audit_job(gw, request, payload):
+    """Analyses the file at path, or the payload, the analysis report being the output buffer."""
+
+    fileType = request["fileType"]
+    if payload:
+        result = gw.GWMemoryToMemoryAnalysisAudit(payload, fileType)
+    else:
+        result = gw.GWFileAnalysisAudit(request["path"], fileType)
+    return _outcome(gw, result, request, result.fileBuffer)
+
+
+def _determine_type_job(gw, request, payload):
+    """Determines the type of the file at path, or of the payload."""
+
+    if payload:
+        enumValue = gw.GWDetermineFileTypeFromFileInMem(payload).enumValue
+    else:
+        enumValue = gw.GWDetermineFileTypeFromFile(request["path"]).enumValue
+    return {"enumValue": enumValue, "fileType": file_type_name(enumValue)}, b""
+
+
+def _version_job(gw, request, payload):
+    """Returns the library version, also a cheap check that the daemon is answering."""
+
+    return {"version": gw.GWFileVersion().text}, b""
+
+
+# Run in a worker with its Glasswall instance, the request header and the request payload
+JOBS = {
+    JOB_PROTECT: _protect_job,
+    JOB_AUDIT: _audit_job,
+    JOB_DETERMINE_TYPE: _determine_type_job,
+    JOB_VERSION: _version_job
+}
+
+
+async def read_frame(reader):
+    """Reads a frame from a stream.
+
+    :param asyncio.StreamReader reader: The stream.
+    :return: The header and payload, or None when the stream has ended.
+    :rtype: tuple or None
+    :raises RebuildDaemonError: If the frame is malformed.
+    """
+
+    try:
+        headerSize, payloadSize = FRAME_PREFIX.unpack(await reader.readexactly(FRAME_PREFIX.size))
+    except asyncio.IncompleteReadError:
+        return None
+    if headerSize > MAX_HEADER_SIZE:
+        raise RebuildDaemonError("Frame header of {0} bytes is too large".format(headerSize))
+    try:
+        header = decode_header(await reader.readexactly(headerSize))
+        payload = await reader.readexactly(payloadSize) if payloadSize else b""
+    except asyncio.IncompleteReadError:
+        return None
+    return header, payload
+
+
+class RebuildDaemon:
+    """Serves jobs from a Unix domain socket with warm Glasswall workers."""
+
+    def __init__(self, socketPath, libraryPath, configXml, workers=1, timeout=None):
+        """Constructor for the daemon. Call serve() to run it.
+
+        :param str socketPath: The Unix domain socket to listen on.
+        :param str libraryPath: The file path to the Glasswall library.
+        :param str configXml: The XML content management configuration applied in every worker.
+        :param int workers: The number of worker processes.
+        :param float timeout: The default seconds a job may take, None for no limit. A worker
+            running past it is killed and replaced.
+        """
+
+        self.socketPath = socketPath
+        self.libraryPath = libraryPath
+        self.configXml = configXml
+        self.workers = workers
+        self.timeout = timeout
+        self.jobs = 0
+
+        self._agw = None
+        self._stop = None
+
+    def _prepare_socket_dir(self):
+        """Creates the directory of the socket readable by the daemon's user only, and checks
+        that a shared temporary directory was not created by another user beforehand.
+
+        :raises RebuildDaemonError: If the directory is not the user's own and private.
+        """
+
+        directory = os.path.dirname(os.path.abspath(self.socketPath))
+        if not os.path.isdir(directory):
+            os.makedirs(directory, mode=0o700)
+        if os.path.dirname(directory) != os.path.abspath(tempfile.gettempdir()):
+            return
+        st = os.lstat(directory)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+            raise RebuildDaemonError(
+                "The socket directory {0} must be a directory owned by and private to this user".format(directory))
+
+    def _remove_stale_socket(self):
+        """Removes the socket left by a daemon that is no longer running.
+
+        :raises RebuildDaemonError: If another daemon is listening on it.
+        """
+
+        if not os.path.exists(self.socketPath):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socketPath)
+        except OSError:
+            os.unlink(self.socketPath)
+            return
+        finally:
+            probe.close()
+        raise RebuildDaemonError("A rebuild daemon is already listening on " + self.socketPath)
+
+    async def serve(self):
+        """Starts the workers and serves jobs until stop() is called or the process is signalled.
+
+        :raises AsyncGlasswallError: If a worker fails to start.
+        :raises RebuildDaemonError: If another daemon is listening on the socket, or its directory is not private.
+        """
+
+        loop = asyncio.get_running_loop()
+        self._stop = loop.create_future()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stop)
+
+        self._prepare_socket_dir()
+        self._remove_stale_socket()
+        async with AsyncGlasswall(self.libraryPath, self.configXml, self.workers, timeout=self.timeout,
+                                  requiredFunctions=REQUIRED_FUNCTIONS) as agw:
+            self._agw = agw
+            # The socket is created private, there is no moment it can be connected to by other users
+            umask = os.umask(0o077)
+            try:
+                server = await asyncio.start_unix_server(self._serve_connection, path=self.socketPath)
+            finally:
+                os.umask(umask)
+            log.info("Listening on %s with %d warm workers", self.socketPath, self.workers)
+            try:
+                await self._stop
+            finally:
+                server.close()
+                await server.wait_closed()
+                if os.path.exists(self.socketPath):
+                    os.unlink(self.socketPath)
+        log.info("Stopped after %d jobs", self.jobs)
+
+    def stop(self):
+        """Stops serving."""
+
+        if self._stop is not None and not self._stop.done():
+            self._stop.set_result(None)
+
+    async def _serve_connection(self, reader, writer):
+        running = set()
+        try:
+            while True:
+                try:
+                    frame = await read_frame(reader)
+                except RebuildDaemonError as e:
+                    log.warning("%s, closing the connection", e)
+                    break
+                if frame is None:
+                    break
+                task = asyncio.ensure_future(self._serve_request(frame[0], frame[1], writer))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            if running:
+                await asyncio.wait(running)
+        finally:
+            writer.close()
+
+    async def _serve_request(self, request, payload, writer):
+        response = {"id": request.get("id"), "ok": False}
+        responsePayload = b""
+        job = JOBS.get(request.get("job"))
+        if job is None:
+            response["error"] = "Unknown job: {0}".format(request.get("job"))
+        else:
+            try:
+                result, responsePayload = await self._agw.call(job, request, payload, timeout=request.get("timeout"))
+                response.update(result, ok=True)
+            except asyncio.TimeoutError:
+                response["error"] = "Timed out, the worker was replaced"
+            except AsyncGlasswallError as e:
+                response["error"] = str(e)
+            self.jobs += 1
+
+        log.debug("%s %s: %s", request.get("job"), request.get("path"), response)
+        # Each frame is written in one piece, so responses completing together never interleave
+        writer.write(encode_header(response, len(responsePayload)) + responsePayload)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Glasswall jobs from warm workers over a Unix domain socket")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="The Unix domain socket to listen on")
+    parser.add_argument("--library", default=DEFAULT_LIBRARY, help="The Glasswall library")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="The XML content management configuration")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Number of warm worker processes")
+    parser.add_argument("--timeout", type=float, help="Seconds a job may take before its worker is replaced")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default=LOG_INFO, help="Lowest level of messages to print")
+    args = parser.parse_args(sys.argv[1:])
+    configure_logging(args.log_level)
+
+    with open(args.config, "r") as f:
+        configXml = f.read()
+
+    daemon = RebuildDaemon(args.socket, args.library, configXml, args.workers, args.timeout)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(daemon.serve())
+    except (AsyncGlasswallError, RebuildDaemonError) as e:
+        sys.exit(str(e))
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,751 @@
+import os
+import time
+import hashlib
+import resource
+import tempfile
+import collections
+import multiprocessing
+import multiprocessing.connection
+
+from Glasswall import Glasswall
+from result_cache import ResultCache, DEFAULT_MAX_BYTES, hash_file
+from ingest import INGEST_PATH, INGEST_MMAP, map_file
+from run_stats import PHASE_READ, PHASE_ENGINE, PHASE_COPY, now_ns
+from output_tree import mirror_path, temp_path
+from file_types import HEADER_SIZE, ANY_FILE_TYPE, FileTypeCache, classify_file, normalise_file_type
+
+_MSG_READY = "ready"
+_MSG_ERROR = "error"
+_MSG_RESULT = "result"
+_MSG_EXIT = "exit"
+
+# Where the engine writes the protected file: into memory returned to the worker, or
+# straight to a file with GWFileToFileProtect
+OUTPUT_MEMORY = "memory"
+OUTPUT_FILE = "file"
+
+# Return status of files whose processing ran past their deadline, never returned by the engine
+TIMEOUT_STATUS = -1000
+# Return status of files that could not be read, or whose output could not be written
+IO_ERROR_STATUS = -1001
+# Return status of files whose worker died while processing them, such as on a crash in the engine
+CRASH_STATUS = -1002
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+class RebuildTask:
+    """A single file to be processed by a rebuild worker."""
+
+    def __init__(self, path, fileType):
+        self.path = path
+        self.fileType = fileType
+
+    path = None  # type: str
+    fileType = None  # type: str
+    attempt = 0  # type: int
+
+
+class RebuildResult:
+    """The outcome of processing a single file in a rebuild worker."""
+
+    def __init__(self):
+        pass
+
+    path = None  # type: str
+    fileType = None  # type: str
+    detectedType = None  # type: str or None
+    returnStatus = 0  # type: int
+    inputSize = 0  # type: int
+    bufferSize = 0  # type: int
+    microseconds = 0  # type: int
+    timings = None  # type: dict
+    message = None  # type: str or None
+    configFingerprint = None  # type: str or None
+    rss = 0  # type: int
+    peakRss = 0  # type: int
+    reset = False  # type: bool
+    timedOut = False  # type: bool
+    crashed = False  # type: bool
+    retried = False  # type: bool
+    output = OUTPUT_MEMORY  # type: str
+    outputData = None  # type: bytearray or None
+    outputTemp = None  # type: str or None
+    outputSource = None  # type: str or None
+    duplicateOf = None  # type: str or None
+    ingest = INGEST_PATH  # type: str
+    cached = False  # type: bool
+    skipped = False  # type: bool
+    workerId = 0  # type: int
+
+
+class RebuildWorkerError(Exception):
+    """Raised when a rebuild worker fails to start or exits unexpectedly."""
+
+
+def rss_bytes():
+    """Returns the resident set size of this process in bytes, or 0 where it cannot be read."""
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def peak_rss_bytes():
+    """Returns the highest resident set size this process has reached, in bytes."""
+
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def usable_cpus():
+    """Returns the number of CPUs this process may actually run on.
+
+    Takes the scheduler affinity mask and any cgroup CPU quota into account, so a
+    container limited to two CPUs on a 64 core host reports 2.
+
+    :return: The number of usable CPUs, at least 1.
+    :rtype: int
+    """
+
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, quota)
+
+    return max(1, cpus)
+
+
+def _cgroup_cpu_quota():
+    """Returns the cgroup CPU quota rounded up to whole CPUs, or None when unlimited."""
+
+    try:
+        # cgroup v2
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota == "max":
+            return None
+        quota, period = int(quota), int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+        except (OSError, ValueError):
+            return None
+        if quota <= 0:
+            return None
+
+    if period <= 0:
+        return None
+    return max(1, -(-quota // period))
+
+
+class Rebuilder:
+    """Owns a loaded Glasswall library with the content management configuration applied."""
+
+    def __init__(self, libraryPath, configXml, cacheDir=None, cacheMaxBytes=DEFAULT_MAX_BYTES, ingest=INGEST_PATH,
+                 routeByHeader=False, resetFiles=0, memoryLimit=0, fileToFileSize=0, outputDir=None, root=None):
+        """Loads the Glasswall library and applies the configuration once.
+
+        :param str libraryPath: The file path to the Glasswall library.
+        :param str configXml: The XML content management configuration.
+        :param str cacheDir: An optional result cache directory, see ResultCache.
+        :param int cacheMaxBytes: The byte budget of the result cache.
+        :param str ingest: How files are handed to the engine, one of ingest.INGEST_MODES.
+        :param bool routeByHeader: Process each file as the type detected from its header rather
+            than the requested file type. Files whose detected type is unknown, or differs from a
+            requested type other than ANY_FILE_TYPE, are skipped.
+        :param int resetFiles: Release the library's resources with GWFileDone and re-apply the
+            configuration after this many engine calls, 0 for never.
+        :param int memoryLimit: Do the same whenever the worker's resident set size exceeds this
+            many bytes after an engine call, 0 for no limit. When it still exceeds the limit
+            after the reset, recycle is set and the worker is replaced by a fresh process.
+        :param int fileToFileSize: Files larger than this many bytes are protected with
+            GWFileToFileProtect, so the protected file never passes through the worker's
+            memory, 0 to process every file in memory.
+        :param str outputDir: An optional output tree the rebuilt files are written to. Results
+            then carry each rebuilt file, in outputData, or for files protected in File to File
+            Protect mode in a temporary file in the output tree named by outputTemp. The cache
+            is not read, as a cached result holds no rebuilt file.
+        :param str root: The root of the input tree mirrored by outputDir.
+        :raises RebuildWorkerError: If the library lacks a function this worker calls, or the
+            configuration could not be applied.
+        """
+
+        self.ingest = ingest
+        self.configXml = configXml
+        self.resetFiles = resetFiles
+        self.memoryLimit = memoryLimit
+        self.fileToFileSize = fileToFileSize
+        self.outputDir = outputDir
+        self.root = root
+        self.engineCalls = 0
+        # Set once a reset did not bring the resident set size back under memoryLimit
+        self.recycle = False
+
+        # The protected file is only copied out of the library when it is written to the output tree
+        self.gw = Glasswall(libraryPath, zeroCopy=True)
+        missing = [name for name in self._required_functions(cacheDir, routeByHeader) if name in self.gw.missingFunctions]
+        if missing:
+            raise RebuildWorkerError("{0} does not export {1}".format(libraryPath, ", ".join(missing)))
+        self._apply_config()
+
+        self.cache = None
+        if cacheDir:
+            self.cache = ResultCache(cacheDir, cacheMaxBytes)
+            self.configHash = self.gw.configFingerprint
+            self.version = self.gw.GWFileVersion().text
+
+        self.fileTypes = FileTypeCache(cacheDir) if routeByHeader else None
+
+    def _required_functions(self, cacheDir, routeByHeader):
+        """Returns the library functions this worker calls with its options, so a library lacking
+        any of them fails when the worker starts rather than on a file.
+        """
+
+        # Files that cannot be memory mapped are always passed by path
+        required = ["GWFileConfigXML", "GWFileDone", "GWFileProcessMsg", "GWFileErrorMsg", "GWFileProtect"]
+        if self.ingest == INGEST_MMAP:
+            required.append("GWMemoryToMemoryProtect")
+        if self.fileToFileSize:
+            required.append("GWFileToFileProtect")
+        if routeByHeader:
+            required.extend(("GWDetermineFileTypeFromFile", "GWDetermineFileTypeFromFileInMem"))
+        if cacheDir:
+            required.append("GWFileVersion")
+        return required
+
+    def _apply_config(self, force=False):
+        configXMLResult = self.gw.GWFileConfigXML(self.configXml, force)
+        if configXMLResult.returnStatus != 1:
+            raise RebuildWorkerError(
+                "Failed to apply the content management configuration for the following reason: "
+                + self.gw.GWFileErrorMsg().text
+            )
+
+    def reset(self):
+        """Releases the memory held by the library with GWFileDone and applies the configuration again.
+
+        :raises RebuildWorkerError: If the configuration could not be applied.
+        """
+
+        self.gw.GWFileDone()
+        # GWFileDone released the configuration, even though the library may still report it
+        self._apply_config(force=True)
+        self.engineCalls = 0
+
+    def rebuild(self, task):
+        """Protects a single file in File to Memory Protect mode, or Memory to Memory Protect mode
+        when files are memory mapped. Files above fileToFileSize are protected in File to File
+        Protect mode instead.
+
+        :param RebuildTask task: The file to process.
+        :return: The outcome of processing the file.
+        :rtype: RebuildResult
+        """
+
+        result = RebuildResult()
+        result.path = task.path
+        result.fileType = task.fileType
+        result.configFingerprint = self.gw.configFingerprint
+        result.timings = timings = {}
+
+        start = now_ns()
+
+        # A file removed or made unreadable since it was discovered fails on its own
+        try:
+            st = os.stat(task.path)
+        except OSError as e:
+            return self._io_error(result, start, e)
+
+        # Files that cannot be mapped, such as empty or special files, fall back to the path
+        result.inputSize = st.st_size
+        if self.fileToFileSize and st.st_size > self.fileToFileSize:
+            result.output = OUTPUT_FILE
+        mapped = map_file(task.path) if self.ingest == INGEST_MMAP and result.output == OUTPUT_MEMORY else None
+
+        try:
+            # Route the file by the type detected from its header instead of its name
+            fileType = task.fileType
+            if self.fileTypes is not None:
+                header = mapped[:HEADER_SIZE] if mapped is not None else None
+                try:
+                    result.detectedType = classify_file(self.gw, task.path, st, self.fileTypes, header)
+                except OSError as e:
+                    return self._io_error(result, start, e)
+                if result.detectedType is None or (
+                    task.fileType != ANY_FILE_TYPE and normalise_file_type(task.fileType) != result.detectedType
+                ):
+                    result.skipped = True
+                    return self._finish(result, start, PHASE_READ)
+                fileType = result.fileType = result.detectedType
+
+            # Unchanged content is answered from the cache without calling the engine, unless the
+            # rebuilt file is needed for the output tree
+            contentHash = None
+            if self.cache is not None:
+                try:
+                    contentHash = hashlib.sha256(mapped).hexdigest() if mapped is not None else hash_file(task.path)
+                except OSError:
+                    # The file goes to the engine uncached, which reports it if it cannot be read
+                    pass
+            if contentHash is not None:
+                cached = None if self.outputDir else self.cache.get(contentHash, self.configHash, self.version, fileType)
+                if cached is not None:
+                    result.returnStatus = cached.returnStatus
+                    result.bufferSize = cached.bufferSize
+                    result.cached = True
+                    return self._finish(result, start, PHASE_READ)
+
+            mark = now_ns()
+            timings[PHASE_READ] = mark - start
+
+            outputBuffer = None
+            if result.output == OUTPUT_FILE:
+                try:
+                    self._protect_to_file(result, fileType)
+                except OSError as e:
+                    return self._io_error(result, start, e)
+            else:
+                if mapped is not None:
+                    protected_f = self.gw.GWMemoryToMemoryProtect(mapped, fileType)
+                    result.ingest = INGEST_MMAP
+                else:
+                    protected_f = self.gw.GWFileProtect(task.path, fileType)
+                result.returnStatus = protected_f.returnStatus
+                outputBuffer = protected_f.fileBuffer
+                result.bufferSize = len(outputBuffer)
+        finally:
+            if mapped is not None:
+                mapped.close()
+
+        now = now_ns()
+        timings[PHASE_ENGINE] = now - mark
+        mark = now
+
+        # The view is released by the next call to the library, so it is copied first
+        if self.outputDir and outputBuffer is not None and result.returnStatus == 1:
+            result.outputData = outputBuffer.copy()
+
+        if result.returnStatus == 1:
+            result.message = self.gw.GWFileProcessMsg().text
+        else:
+            result.message = self.gw.GWFileErrorMsg().text
+
+        if contentHash is not None:
+            self.cache.put(contentHash, self.configHash, self.version, fileType, result.returnStatus, result.bufferSize)
+
+        self._finish(result, mark, PHASE_COPY)
+
+        self.engineCalls += 1
+        if (self.resetFiles and self.engineCalls >= self.resetFiles) or (self.memoryLimit and result.rss > self.memoryLimit):
+            self.reset()
+            result.reset = True
+            # Memory the process kept after the library released its own, resetting again would not free it
+            if self.memoryLimit and rss_bytes() > self.memoryLimit:
+                self.recycle = True
+
+        return result
+
+    def _protect_to_file(self, result, fileType):
+        """Protects a file with GWFileToFileProtect into a temporary file, in the output tree
+        when there is one, and sets the return status and size of the protected file.
+        """
+
+        if self.outputDir:
+            outputPath = temp_path(mirror_path(self.outputDir, self.root, result.path))
+        else:
+            fd, outputPath = tempfile.mkstemp(prefix="gw-rebuild-")
+            os.close(fd)
+
+        try:
+            result.returnStatus = self.gw.GWFileToFileProtect(result.path, fileType, outputPath).returnStatus
+            # The engine may remove or not write the output of a file it could not protect
+            result.bufferSize = os.path.getsize(outputPath) if os.path.exists(outputPath) else 0
+            if self.outputDir and result.returnStatus == 1:
+                # Renamed into place by the output writer
+                result.outputTemp = outputPath
+        finally:
+            if result.outputTemp is None and os.path.exists(outputPath):
+                os.unlink(outputPath)
+
+    def _io_error(self, result, mark, error):
+        """Completes the result of a file that could not be read, or whose output could not be written."""
+
+        result.returnStatus = IO_ERROR_STATUS
+        result.message = "I/O error: {0}".format(error)
+        return self._finish(result, mark, PHASE_READ)
+
+    def _finish(self, result, mark, phase):
+        """Records the time since mark under the given phase, the total time of the result and
+        the worker's memory use.
+        """
+
+        result.timings[phase] = now_ns() - mark
+        result.microseconds = sum(result.timings.values()) // 1000
+        result.rss = rss_bytes()
+        result.peakRss = peak_rss_bytes()
+        return result
+
+
+def _worker_main(workerId, rebuilderArgs, conn, maxTasks=0):
+    """Entry point of a rebuild worker process.
+
+    Loads the library and applies the configuration once, then processes the tasks sent
+    on its connection until it receives None, until it has processed maxTasks tasks
+    when maxTasks is set, or until its memory use stays over the limit after a reset.
+    """
+
+    try:
+        rebuilder = Rebuilder(**rebuilderArgs)
+    except Exception as e:
+        conn.send((_MSG_ERROR, workerId, str(e)))
+        return
+
+    conn.send((_MSG_READY, workerId, None))
+
+    tasks = 0
+    while True:
+        try:
+            item = conn.recv()
+        except EOFError:
+            break
+        if item is None:
+            break
+
+        result = rebuilder.rebuild(item)
+        result.workerId = workerId
+        result.retried = item.attempt > 0
+        conn.send((_MSG_RESULT, workerId, result))
+
+        tasks += 1
+        if (maxTasks and tasks >= maxTasks) or rebuilder.recycle:
+            # Exit so the parent starts a fresh process in this one's place
+            conn.send((_MSG_EXIT, workerId, None))
+            break
+
+
+class _Worker:
+    """The parent's handle on a worker process and the tasks sent to it."""
+
+    def __init__(self, workerId, process, conn, retry):
+        self.workerId = workerId
+        self.process = process
+        self.conn = conn
+        self.retry = retry
+        self.ready = False
+        # Tasks sent and not yet answered, the first is being processed
+        self.tasks = collections.deque()
+        self.sent = 0
+        # When the worker must have finished its first task, None without a file timeout
+        self.deadline = None
+
+
+class RebuildPool:
+    """A pool of worker processes, each holding its own configured Glasswall library.
+
+    Each worker has its own pipe, so the parent knows which file every worker is
+    processing and can kill one that runs past its deadline without affecting the others.
+    """
+
+    # How many tasks may be sent to each worker before the parent waits for its results
+    tasksPerWorker = 2
+
+    def __init__(self, libraryPath, configXml, workers=None, maxTasksPerWorker=0, fileTimeout=0, retryTimeoutFactor=4,
+                 tasksPerWorker=None, **rebuilderArgs):
+        """Constructor for the rebuild pool. Call start() before submitting files.
+
+        :param str libraryPath: The file path to the Glasswall library.
+        :param str configXml: The XML content management configuration.
+        :param int workers: The number of worker processes, defaults to usable_cpus().
+        :param int maxTasksPerWorker: Replace each worker with a fresh process after it has
+            processed this many files, 0 to keep workers for the whole run.
+        :param float fileTimeout: Seconds a worker may spend on a file before it is killed and
+            replaced, 0 for no limit. The file is retried once in a fresh process with
+            retryTimeoutFactor times the budget, and reported with TIMEOUT_STATUS if that
+            times out too.
+        :param float retryTimeoutFactor: The budget of a retry relative to fileTimeout.
+        :param int tasksPerWorker: How many tasks may be sent to each worker ahead of its results,
+            defaults to the class attribute. Pass 1 to send each task to the first free worker,
+            which keeps the order of the tasks across workers.
+        :param rebuilderArgs: Further keyword arguments passed to each worker's Rebuilder.
+        """
+
+        self.workers = workers or usable_cpus()
+        self.maxTasksPerWorker = maxTasksPerWorker
+        self.fileTimeout = fileTimeout
+        self.retryTimeoutFactor = retryTimeoutFactor
+        if tasksPerWorker is not None:
+            self.tasksPerWorker = tasksPerWorker
+        self.rebuilderArgs = dict(rebuilderArgs, libraryPath=libraryPath, configXml=configXml)
+        self.restarts = 0
+        self.timeouts = 0
+
+        self._workers = {}
+        self._nextWorkerId = 0
+        # Tasks taken back from killed workers, sent again before any new task
+        self._backlog = collections.deque()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _start_worker(self, retryTask=None):
+        """Starts a worker process, or a process that retries a single task and exits."""
+
+        workerId = self._nextWorkerId
+        self._nextWorkerId += 1
+
+        conn, childConn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_worker_main,
+            args=(workerId, self.rebuilderArgs, childConn, 0 if retryTask else self.maxTasksPerWorker),
+            daemon=True
+        )
+        process.start()
+        childConn.close()
+
+        worker = self._workers[workerId] = _Worker(workerId, process, conn, retryTask is not None)
+        if retryTask is not None:
+            self._send(worker, retryTask)
+        return worker
+
+    def _stop_worker(self, worker, kill=False):
+        del self._workers[worker.workerId]
+        if kill:
+            worker.process.terminate()
+        else:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+        worker.process.join()
+        worker.conn.close()
+
+    def _budget(self, task):
+        return self.fileTimeout * self.retryTimeoutFactor ** task.attempt
+
+    def _send(self, worker, task):
+        worker.tasks.append(task)
+        worker.sent += 1
+        try:
+            worker.conn.send(task)
+        except OSError:
+            # The worker is exiting, its tasks are taken back when its exit or death is received
+            return
+        if len(worker.tasks) == 1 and worker.ready:
+            self._start_deadline(worker)
+
+    def _start_deadline(self, worker):
+        if self.fileTimeout and worker.tasks:
+            worker.deadline = time.monotonic() + self._budget(worker.tasks[0])
+        else:
+            worker.deadline = None
+
+    def start(self):
+        """Starts the worker processes and waits for each to load the library.
+
+        :raises RebuildWorkerError: If any worker fails to start.
+        """
+
+        for _ in range(self.workers):
+            self._start_worker()
+
+        try:
+            while not all(worker.ready for worker in self._workers.values()):
+                self._receive(None)
+        except RebuildWorkerError:
+            self.close()
+            raise
+
+    def imap_unordered(self, tasks):
+        """Processes tasks across the workers, yielding results as they complete.
+
+        Tasks are consumed lazily so that the iterable may still be producing files while
+        earlier ones are being processed.
+
+        :param iterable tasks: The RebuildTask objects to process.
+        :return: A generator of RebuildResult objects in completion order.
+        :raises RebuildWorkerError: If a worker dies, or a replacement worker fails to start.
+        """
+
+        tasks = iter(tasks)
+        exhausted = False
+
+        while True:
+            # Top up every worker that can take more work
+            for worker in list(self._workers.values()):
+                while (
+                    worker.ready and not worker.retry and len(worker.tasks) < self.tasksPerWorker
+                    and not (self.maxTasksPerWorker and worker.sent >= self.maxTasksPerWorker)
+                ):
+                    if self._backlog:
+                        task = self._backlog.popleft()
+                    elif not exhausted:
+                        task = next(tasks, None)
+                        if task is None:
+                            exhausted = True
+                            break
+                    else:
+                        break
+                    self._send(worker, task)
+
+            if exhausted and not self._backlog and not any(worker.tasks for worker in self._workers.values()):
+                return
+
+            for result in self._receive(self._next_deadline()):
+                yield result
+            for result in self._expire():
+                yield result
+
+    def _receive(self, timeout):
+        """Waits up to timeout seconds for messages from the workers and handles them.
+
+        :param float timeout: The most seconds to wait, None to wait until a message arrives.
+        :return: A list of the RebuildResult objects received, including those of files whose
+            worker died while processing them on their retry.
+        :raises RebuildWorkerError: If a worker failed to start.
+        """
+
+        results = []
+        connections = dict((worker.conn, worker) for worker in self._workers.values())
+        for conn in multiprocessing.connection.wait(list(connections), timeout):
+            worker = connections[conn]
+            try:
+                kind, workerId, payload = conn.recv()
+            except (EOFError, OSError):
+                worker.process.join()
+                if not worker.ready:
+                    raise RebuildWorkerError(
+                        "Rebuild worker exited unexpectedly with code {0}".format(worker.process.exitcode)
+                    )
+                # The worker died processing a file, handled like a timeout
+                exitcode = worker.process.exitcode
+                task = self._take_back(worker)
+                if task is not None:
+                    result = self._failed_result(worker, task, CRASH_STATUS,
+                                                 "Worker exited with code {0} processing the file".format(exitcode))
+                    result.crashed = True
+                    results.append(result)
+                continue
+
+            if kind == _MSG_READY:
+                worker.ready = True
+                self._start_deadline(worker)
+            elif kind == _MSG_RESULT:
+                worker.tasks.popleft()
+                self._start_deadline(worker)
+                results.append(payload)
+                if worker.retry:
+                    self._stop_worker(worker)
+            elif kind == _MSG_EXIT:
+                # The worker reached maxTasksPerWorker or its memory limit, files already sent
+                # to it go first to the other workers
+                self._backlog.extendleft(reversed(worker.tasks))
+                worker.tasks.clear()
+                self._stop_worker(worker)
+                if not worker.retry:
+                    self._start_worker()
+                    self.restarts += 1
+            elif kind == _MSG_ERROR:
+                raise RebuildWorkerError(payload)
+
+        return results
+
+    def _next_deadline(self):
+        """Returns the seconds until the earliest worker deadline, or None if there is none."""
+
+        deadlines = [worker.deadline for worker in self._workers.values() if worker.deadline is not None]
+        if not deadlines:
+            return None
+        return max(0, min(deadlines) - time.monotonic())
+
+    def _expire(self):
+        """Kills the workers whose file ran past its deadline, retries the file in a fresh
+        process or returns its timeout result, and replaces the killed workers.
+
+        :return: A list of RebuildResult objects for files that timed out on their retry.
+        """
+
+        results = []
+        now = time.monotonic()
+        for worker in list(self._workers.values()):
+            if worker.deadline is None or now < worker.deadline:
+                continue
+
+            self.timeouts += 1
+            budget = self._budget(worker.tasks[0])
+            task = self._take_back(worker)
+            if task is None:
+                continue
+
+            result = self._failed_result(worker, task, TIMEOUT_STATUS, "Timed out after {0:g} seconds".format(budget))
+            result.timedOut = True
+            result.microseconds = int(budget * 1e6)
+            result.timings = {PHASE_ENGINE: int(budget * 1e9)}
+            results.append(result)
+
+        return results
+
+    def _take_back(self, worker):
+        """Kills a worker that ran past its deadline or died, and replaces it.
+
+        Files sent to it after the one it was processing go to the other workers, and that
+        file is retried once in a fresh process.
+
+        :return: The file it was processing if that was already its retry, otherwise None.
+        :rtype: RebuildTask or None
+        """
+
+        self._stop_worker(worker, kill=True)
+        task = worker.tasks.popleft() if worker.tasks else None
+        self._backlog.extend(worker.tasks)
+        if not worker.retry:
+            self._start_worker()
+            self.restarts += 1
+
+        if task is not None and task.attempt == 0:
+            task.attempt += 1
+            self._start_worker(retryTask=task)
+            return None
+        return task
+
+    def _failed_result(self, worker, task, returnStatus, message):
+        """Returns the result of a file that failed on its retry without a result from the worker."""
+
+        result = RebuildResult()
+        result.path = task.path
+        result.fileType = task.fileType
+        result.returnStatus = returnStatus
+        result.retried = True
+        result.workerId = worker.workerId
+        result.timings = {}
+        result.message = message
+        return result
+
+    def close(self):
+        """Stops the worker processes."""
+
+        for worker in self._workers.values():
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+        for worker in self._workers.values():
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.conn.close()
+        self._workers = {}
@@ -0,0 +1,142 @@
+import xml.etree.ElementTree as ET
+
+from Glasswall import GwBufferView
+
+# Bytes of the report fed to the parser at a time
+CHUNK_SIZE = 1 << 16
+
+ITEM_CONTENT = "content"
+ITEM_ISSUE = "issue"
+ITEM_SANITISATION = "sanitisation"
+ITEM_REMEDY = "remedy"
+
+# Report elements holding one record each, and the element holding the record's ID
+_ITEMS = {
+    "ContentItem": (ITEM_CONTENT, None),
+    "IssueItem": (ITEM_ISSUE, "IssueID"),
+    "SanitisationItem": (ITEM_SANITISATION, "SanitisationID"),
+    "RemedyItem": (ITEM_REMEDY, "RemedyID")
+}
+
+
+class ReportItem:
+    """A content, issue, sanitisation or remedy item from an analysis report."""
+
+    __slots__ = ("kind", "group", "description", "itemId", "instanceCount")
+
+    def __init__(self, kind, group, description, itemId, instanceCount):
+        self.kind = kind
+        self.group = group
+        self.description = description
+        self.itemId = itemId
+        self.instanceCount = instanceCount
+
+    def __repr__(self):
+        return "ReportItem({0!r}, {1!r}, {2!r}, {3!r}, {4!r})".format(
+            self.kind, self.group, self.description, self.itemId, self.instanceCount
+        )
+
+
+class ReportSummary:
+    """Totals of the items in an analysis report."""
+
+    def __init__(self):
+        self.contentItems = 0  # type: int
+        self.issueIds = {}  # type: dict
+        self.sanitisations = 0  # type: int
+        self.remedies = 0  # type: int
+
+
+def _local_name(tag):
+    """Returns a tag without its namespace, e.g. "{http://glasswall.com/namespace}IssueID" gives "IssueID"."""
+
+    return tag.rpartition("}")[2]
+
+
+def _to_int(text):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_report(reportBuffer, chunkSize=CHUNK_SIZE):
+    """Parses an analysis report incrementally and yields its items as they are read.
+
+    Each item element is discarded once yielded, so memory use does not grow with the size
+    of the report.
+
+    :param reportBuffer: The XML report, such as the reportBuffer returned by
+        GWFileProtectAndReport, a GwBufferView or any bytes-like object.
+    :param int chunkSize: Bytes of the report fed to the parser at a time.
+    :return: A generator of ReportItem objects.
+    :raises xml.etree.ElementTree.ParseError: If the report is not well formed.
+    """
+
+    # Slices of a GwBufferView are copied out of the library's memory as bytes
+    view = reportBuffer if isinstance(reportBuffer, GwBufferView) else memoryview(reportBuffer)
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack = []
+    group = None
+
+    for offset in range(0, len(view), chunkSize):
+        parser.feed(bytes(view[offset:offset + chunkSize]))
+        for event, element in parser.read_events():
+            if event == "start":
+                stack.append(element)
+                continue
+
+            stack.pop()
+            name = _local_name(element.tag)
+
+            if name == "BriefDescription" and stack and _local_name(stack[-1].tag) == "ContentGroup":
+                group = (element.text or "").strip()
+
+            elif name in _ITEMS:
+                kind, idName = _ITEMS[name]
+                description = None
+                itemId = None
+                instanceCount = None
+                for child in element:
+                    childName = _local_name(child.tag)
+                    if childName == "TechnicalDescription":
+                        description = (child.text or "").strip()
+                    elif childName == "InstanceCount":
+                        instanceCount = _to_int(child.text)
+                    elif childName == idName:
+                        itemId = _to_int(child.text)
+                yield ReportItem(kind, group, description, itemId, instanceCount)
+
+                # Drop the item from the tree, it is always the last child of its parent
+                if stack:
+                    stack[-1].remove(element)
+
+            elif name == "ContentGroup":
+                group = None
+                if stack:
+                    stack[-1].remove(element)
+
+    parser.close()
+
+
+def summarise_report(reportBuffer):
+    """Counts the items of an analysis report.
+
+    :param reportBuffer: The XML report, see iter_report().
+    :return: The number of content items, sanitisations and remedies, and the instance count of
+        each issue ID.
+    :rtype: ReportSummary
+    """
+
+    summary = ReportSummary()
+    for item in iter_report(reportBuffer):
+        count = item.instanceCount if item.instanceCount is not None else 1
+        if item.kind == ITEM_CONTENT:
+            summary.contentItems += count
+        elif item.kind == ITEM_ISSUE:
+            summary.issueIds[item.itemId] = summary.issueIds.get(item.itemId, 0) + count
+        elif item.kind == ITEM_SANITISATION:
+            summary.sanitisations += count
+        elif item.kind == ITEM_REMEDY:
+            summary.remedies += count
+    return summary
@@ -0,0 +1,176 @@
+import os
+import time
+import sqlite3
+import hashlib
+
+# Bytes accounted to every entry on top of the stored report, covering the key and row overhead
+ENTRY_OVERHEAD = 256
+
+# Default byte budget for the cache
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    content_hash TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    version TEXT NOT NULL,
+    file_type TEXT NOT NULL,
+    return_status INTEGER NOT NULL,
+    buffer_size INTEGER NOT NULL,
+    report BLOB,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (content_hash, config_hash, version, file_type)
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+
+class CachedResult:
+    """A GWFileProtect outcome retrieved from the result cache."""
+
+    def __init__(self):
+        pass
+
+    returnStatus = 0  # type: int
+    bufferSize = 0  # type: int
+    reportBuffer = None  # type: bytes or None
+
+
+def hash_file(path, chunkSize=1024 * 1024):
+    """Returns the SHA-256 hex digest of a file's content.
+
+    :param str path: The file path to hash.
+    :param int chunkSize: The number of bytes read at a time.
+    :rtype: str
+    """
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunkSize), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """A persistent, content-addressed cache of Glasswall processing outcomes.
+
+    Entries are keyed by the content hash of the input file, the hash of the applied
+    configuration, the Glasswall library version and the file type the file was processed
+    as, and stored in a SQLite index inside
+    the cache directory. The directory can be persisted between runs. Once the stored
+    entries exceed the byte budget, the least recently used are evicted.
+    """
+
+    fileName = "results.sqlite"
+
+    def __init__(self, cacheDir, maxBytes=DEFAULT_MAX_BYTES):
+        """Opens, or creates, the cache in the given directory.
+
+        :param str cacheDir: The directory holding the cache index.
+        :param int maxBytes: The byte budget enforced by evict().
+        """
+
+        # Every worker opens the cache at the same time, any of them may create it
+        os.makedirs(cacheDir, exist_ok=True)
+
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        self._db = sqlite3.connect(os.path.join(cacheDir, self.fileName), timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def get(self, contentHash, configHash, version, fileType):
+        """Looks up a cached outcome and marks it as recently used.
+
+        :param str contentHash: The content hash of the input file.
+        :param str configHash: The hash of the applied configuration.
+        :param str version: The Glasswall library version.
+        :param str fileType: The file type the file is processed as.
+        :return: The cached outcome, or None on a miss.
+        :rtype: CachedResult or None
+        """
+
+        key = (contentHash, configHash, version, fileType)
+        row = self._db.execute(
+            "SELECT return_status, buffer_size, report FROM results"
+            " WHERE content_hash = ? AND config_hash = ? AND version = ? AND file_type = ?",
+            key
+        ).fetchone()
+        if row is None:
+            return None
+
+        self._db.execute(
+            "UPDATE results SET last_used = ?"
+            " WHERE content_hash = ? AND config_hash = ? AND version = ? AND file_type = ?",
+            (time.time(),) + key
+        )
+        self._db.commit()
+
+        cached = CachedResult()
+        cached.returnStatus = row[0]
+        cached.bufferSize = row[1]
+        cached.reportBuffer = None if row[2] is None else bytes(row[2])
+        return cached
+
+    def put(self, contentHash, configHash, version, fileType, returnStatus, bufferSize, reportBuffer=None):
+        """Stores the outcome of processing a file.
+
+        :param str contentHash: The content hash of the input file.
+        :param str configHash: The hash of the applied configuration.
+        :param str version: The Glasswall library version.
+        :param str fileType: The file type the file was processed as.
+        :param int returnStatus: The status returned by Glasswall.
+        :param int bufferSize: The size of the protected file.
+        :param bytes reportBuffer: An optional report to store alongside the outcome.
+        """
+
+        report = None if reportBuffer is None else sqlite3.Binary(bytes(reportBuffer))
+        size = ENTRY_OVERHEAD + (0 if report is None else len(report))
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO results"
+            " (content_hash, config_hash, version, file_type, return_status, buffer_size, report, size, last_used)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (contentHash, configHash, version, fileType, returnStatus, bufferSize, report, size, time.time())
+        )
+        self._db.commit()
+
+    def total_bytes(self):
+        """Returns the number of bytes accounted to the stored entries.
+
+        :rtype: int
+        """
+
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def evict(self):
+        """Evicts the least recently used entries until the cache is within its byte budget.
+
+        :return: The number of entries evicted.
+        :rtype: int
+        """
+
+        excess = self.total_bytes() - self.maxBytes
+        if excess <= 0:
+            return 0
+
+        victims = []
+        for row in self._db.execute(
+            "SELECT rowid, size FROM results ORDER BY last_used ASC"
+        ):
+            victims.append((row[0],))
+            excess -= row[1]
+            if excess <= 0:
+                break
+
+        self._db.executemany("DELETE FROM results WHERE rowid = ?", victims)
+        self._db.commit()
+        return len(victims)
+
+    def close(self):
+        """Closes the cache index."""
+
+        self._db.close()
@@ -0,0 +1,242 @@
+import io
+import os
+import json
+from xml.sax.saxutils import quoteattr, escape
+
+SINK_JSONL = "jsonl"
+SINK_JUNIT = "junit"
+SINK_SARIF = "sarif"
+
+SINK_FORMATS = (SINK_JSONL, SINK_JUNIT, SINK_SARIF)
+
+# Results are written through a buffer of this size, so a record costs no system call
+WRITE_BUFFER_SIZE = 1 << 16
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_RULE_ID = "glasswall-rebuild"
+
+
+def result_record(result):
+    """Returns the record written for a result.
+
+    :param rebuild_pool.RebuildResult result: The result of a file.
+    :rtype: dict
+    """
+
+    return {
+        "path": result.path,
+        "fileType": result.fileType,
+        "detectedType": result.detectedType,
+        "returnStatus": result.returnStatus,
+        "timings": result.timings,
+        "outputSize": result.bufferSize,
+        "message": result.message,
+        "configFingerprint": result.configFingerprint,
+        "cached": result.cached,
+        "skipped": result.skipped,
+        "timedOut": result.timedOut,
+        "crashed": result.crashed,
+        "retried": result.retried,
+        "output": result.output,
+        "duplicateOf": result.duplicateOf
+    }
+
+
+class ResultSink:
+    """Writes each result to a file as soon as it is received, keeping nothing in memory."""
+
+    def __init__(self, path, root):
+        """Creates the file.
+
+        :param str path: The file to write.
+        :param str root: The scanned directory, paths are written relative to it.
+        """
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.root = root
+        self.file = io.open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+        self.begin()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def relative_path(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def record(self, result):
+        """Returns the record of a result, with its path relative to the scanned directory."""
+
+        record = result_record(result)
+        record["path"] = self.relative_path(result.path)
+        if result.duplicateOf is not None:
+            record["duplicateOf"] = self.relative_path(result.duplicateOf)
+        return record
+
+    def begin(self):
+        """Writes what comes before the first result."""
+
+    def write(self, result):
+        """Writes a result.
+
+        :param rebuild_pool.RebuildResult result: The result of a file.
+        """
+
+        raise NotImplementedError
+
+    def end(self):
+        """Writes what comes after the last result."""
+
+    def close(self):
+        """Completes and closes the file."""
+
+        if not self.file.closed:
+            self.end()
+            self.file.close()
+
+
+class JsonlSink(ResultSink):
+    """One JSON record per line."""
+
+    def write(self, result):
+        self.file.write(json.dumps(self.record(result), sort_keys=True) + "\n")
+
+
+class JUnitSink(ResultSink):
+    """A JUnit XML test suite with a test case per file, failed when the file was not rebuilt.
+
+    The suite totals are only known at the end, so the header reserves room for them and is
+    rewritten in place on close.
+    """
+
+    # Room reserved in the header for the totals to grow into
+    headerPadding = 64
+
+    def begin(self):
+        self.tests = 0
+        self.failures = 0
+        self.skipped = 0
+        self.seconds = 0.0
+        self.headerWidth = 0
+        self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self.file.flush()
+        self.headerOffset = self.file.tell()
+        self.headerWidth = len(self.header()) + self.headerPadding
+        self.file.write(self.header() + "\n")
+
+    def header(self):
+        """Returns the testsuite start tag with the current totals, padded to the reserved width."""
+
+        header = '<testsuite name="glasswall-rebuild" tests="{0}" failures="{1}" skipped="{2}" time="{3:.6f}"'.format(
+            self.tests, self.failures, self.skipped, self.seconds
+        )
+        return header.ljust(self.headerWidth - 1) + ">"
+
+    def write(self, result):
+        seconds = sum(result.timings.values()) / 1e9 if result.timings else 0.0
+        self.tests += 1
+        self.seconds += seconds
+
+        self.file.write('  <testcase classname={0} name={1} time="{2:.6f}">'.format(
+            quoteattr(str(result.fileType or "")), quoteattr(self.relative_path(result.path)), seconds
+        ))
+        if result.skipped:
+            self.skipped += 1
+            self.file.write('<skipped message={0}/>'.format(
+                quoteattr("detected file type: " + str(result.detectedType))
+            ))
+        elif result.returnStatus != 1:
+            self.failures += 1
+            self.file.write('<failure message={0} type="returnStatus {1}">{2}</failure>'.format(
+                quoteattr(result.message or ""), result.returnStatus, escape(result.message or "")
+            ))
+        self.file.write('<system-out>{0}</system-out></testcase>\n'.format(
+            escape(json.dumps(self.record(result), sort_keys=True))
+        ))
+
+    def end(self):
+        self.file.write("</testsuite>\n")
+        self.file.flush()
+        self.file.seek(self.headerOffset)
+        self.file.write(self.header())
+
+
+class SarifSink(ResultSink):
+    """A SARIF 2.1.0 log with a result per processed file, an error for each file that was not
+    rebuilt and a pass for every other.
+    """
+
+    def begin(self):
+        self.count = 0
+        run = json.dumps({
+            "tool": {
+                "driver": {
+                    "name": "Glasswall Rebuild",
+                    "rules": [{
+                        "id": SARIF_RULE_ID,
+                        "shortDescription": {"text": "File could not be rebuilt by the Glasswall engine"}
+                    }]
+                }
+            },
+            "results": []
+        })
+        # Results are streamed into the empty array at the end of the run object
+        self.file.write('{"$schema": "' + SARIF_SCHEMA + '", "version": "2.1.0", "runs": [' + run[:-2] + "\n")
+
+    def write(self, result):
+        if result.skipped:
+            return
+
+        rebuilt = result.returnStatus == 1
+        sarifResult = {
+            "ruleId": SARIF_RULE_ID,
+            "kind": "pass" if rebuilt else "fail",
+            "level": "none" if rebuilt else "error",
+            "message": {"text": result.message or "returnStatus " + str(result.returnStatus)},
+            "locations": [{"physicalLocation": {"artifactLocation": {"uri": self.relative_path(result.path)}}}],
+            "properties": self.record(result)
+        }
+
+        self.file.write(("," if self.count else "") + json.dumps(sarifResult, sort_keys=True) + "\n")
+        self.count += 1
+
+    def end(self):
+        self.file.write("]}]}\n")
+
+
+SINKS = {
+    SINK_JSONL: JsonlSink,
+    SINK_JUNIT: JUnitSink,
+    SINK_SARIF: SarifSink
+}
+
+
+def parse_sink(value):
+    """Splits a FORMAT:PATH results argument.
+
+    :param str value: The argument, e.g. "jsonl:results.jsonl".
+    :return: A (format, path) pair.
+    :rtype: tuple
+    :raises ValueError: When the format is not one of SINK_FORMATS.
+    """
+
+    sinkFormat, _, path = value.partition(":")
+    if sinkFormat not in SINKS or not path:
+        raise ValueError("Expected FORMAT:PATH with FORMAT one of " + ", ".join(SINK_FORMATS) + ", got " + value)
+    return sinkFormat, path
+
+
+def open_sink(sinkFormat, path, root):
+    """Creates a result sink.
+
+    :param str sinkFormat: One of SINK_FORMATS.
+    :param str path: The file to write.
+    :param str root: The scanned directory, paths are written relative to it.
+    :rtype: ResultSink
+    """
+
+    return SINKS[sinkFormat](path, root)
@@ -0,0 +1,112 @@
+import sys
+import time
+import logging
+import threading
+
+LOG_DEBUG = "debug"
+LOG_INFO = "info"
+LOG_WARN = "warn"
+LOG_ERROR = "error"
+
+LOG_LEVELS = (LOG_DEBUG, LOG_INFO, LOG_WARN, LOG_ERROR)
+
+_LEVELS = {
+    LOG_DEBUG: logging.DEBUG,
+    LOG_INFO: logging.INFO,
+    LOG_WARN: logging.WARNING,
+    LOG_ERROR: logging.ERROR
+}
+
+_LEVEL_NAMES = dict((level, name) for name, level in _LEVELS.items())
+
+log = logging.getLogger("glasswall.rebuild")
+
+
+class LevelFormatter(logging.Formatter):
+    """Formats records as "--[level] message", the format the action has always printed."""
+
+    def format(self, record):
+        return "--[" + _LEVEL_NAMES.get(record.levelno, record.levelname.lower()) + "] " + record.getMessage()
+
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """Writes records to a stream without flushing it after each one.
+
+    The stream is flushed once bufferSize characters are pending, for records at flushLevel
+    or above, and when logging shuts down. A background thread flushes records left pending
+    for flushInterval seconds, so lines logged before a long engine call are not held back
+    until the next record.
+    """
+
+    def __init__(self, stream=None, bufferSize=1 << 16, flushInterval=1.0, flushLevel=logging.ERROR):
+        logging.StreamHandler.__init__(self, stream)
+        self.bufferSize = bufferSize
+        self.flushInterval = flushInterval
+        self.flushLevel = flushLevel
+        self._pending = []
+        self._pendingSize = 0
+        self._lastFlush = time.monotonic()
+        self._stopped = threading.Event()
+        self._timer = None
+
+    def _start_timer(self):
+        self._timer = threading.Thread(target=self._run_timer, name="log-flush", daemon=True)
+        self._timer.start()
+
+    def _run_timer(self):
+        while not self._stopped.wait(self.flushInterval):
+            if self._pending and time.monotonic() - self._lastFlush >= self.flushInterval:
+                self.flush()
+
+    def emit(self, record):
+        try:
+            line = self.format(record) + self.terminator
+        except Exception:
+            self.handleError(record)
+            return
+
+        self._pending.append(line)
+        self._pendingSize += len(line)
+        if self._timer is None:
+            self._start_timer()
+        if (
+            self._pendingSize >= self.bufferSize
+            or record.levelno >= self.flushLevel
+            or time.monotonic() - self._lastFlush >= self.flushInterval
+        ):
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._pending:
+                self.stream.write("".join(self._pending))
+                self._pending = []
+                self._pendingSize = 0
+            if self.stream and hasattr(self.stream, "flush"):
+                self.stream.flush()
+            self._lastFlush = time.monotonic()
+        finally:
+            self.release()
+
+    def close(self):
+        self._stopped.set()
+        self.flush()
+        logging.StreamHandler.close(self)
+
+
+def configure_logging(level=LOG_INFO, stream=None):
+    """Sends the action's log to a buffered handler on stdout.
+
+    :param str level: The lowest level written, one of LOG_LEVELS.
+    :param stream: The stream to write to, stdout by default.
+    :return: The action's logger.
+    :rtype: logging.Logger
+    """
+
+    handler = BufferedStreamHandler(stream or sys.stdout)
+    handler.setFormatter(LevelFormatter())
+    log.handlers = [handler]
+    log.setLevel(_LEVELS[level])
+    log.propagate = False
+    return log
@@ -0,0 +1,127 @@
+import time
+from array import array
+
+# Monotonic nanosecond clock, perf_counter_ns is available from Python 3.7
+try:
+    now_ns = time.perf_counter_ns
+except AttributeError:
+    def now_ns():
+        return int(time.perf_counter() * 1e9)
+
+PHASE_DISCOVERY = "discovery"
+PHASE_READ = "read"
+PHASE_ENGINE = "engine"
+PHASE_COPY = "copy"
+PHASE_REPORT = "report"
+
+# Phases in the order a file goes through them
+PHASES = (PHASE_DISCOVERY, PHASE_READ, PHASE_ENGINE, PHASE_COPY, PHASE_REPORT)
+
+
+def percentile(sortedValues, q):
+    """Returns the nearest-rank percentile of a sorted sequence.
+
+    :param sortedValues: The values, sorted ascending.
+    :param float q: The percentile, between 0 and 100.
+    :rtype: int
+    """
+
+    if not sortedValues:
+        return 0
+    rank = max(1, int(-(-q * len(sortedValues) // 100)))
+    return sortedValues[rank - 1]
+
+
+def timed(iterable, stats, phase):
+    """Yields the items of an iterable, recording how long each took to produce.
+
+    :param iterable iterable: The iterable, such as a file discovery generator.
+    :param RunStats stats: The statistics to record to.
+    :param str phase: The phase to record the time under.
+    """
+
+    iterator = iter(iterable)
+    while True:
+        start = now_ns()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        stats.add(phase, now_ns() - start)
+        yield item
+
+
+class RunStats:
+    """Collects per-phase and per-file-type latencies for a run and summarises them."""
+
+    def __init__(self):
+        self.start = now_ns()
+        self.files = 0
+        self.bytes = 0
+        self._phases = dict((phase, array("q")) for phase in PHASES)
+        self._fileTypes = {}
+        self._outputs = {}
+
+    def add(self, phase, ns):
+        """Records the time a file spent in a phase.
+
+        :param str phase: One of PHASES.
+        :param int ns: The time in nanoseconds.
+        """
+
+        self._phases[phase].append(ns)
+
+    def add_file(self, fileType, size, timings, output=None):
+        """Records a processed file.
+
+        :param str fileType: The file type it was processed as.
+        :param int size: The size of the input file in bytes.
+        :param dict timings: Nanoseconds spent in each phase by the worker.
+        :param str output: How the protected file was returned, e.g. in memory or to a file.
+        """
+
+        self.files += 1
+        self.bytes += size
+        if output is not None:
+            files, totalBytes = self._outputs.get(output, (0, 0))
+            self._outputs[output] = (files + 1, totalBytes + size)
+        for phase, ns in timings.items():
+            self._phases[phase].append(ns)
+        self._fileTypes.setdefault(fileType, array("q")).append(sum(timings.values()))
+
+    def summary_lines(self):
+        """Returns the summary table, with count and p50/p90/p99/max milliseconds for every phase
+        and for the total time per file of every file type.
+
+        :rtype: list
+        """
+
+        elapsed = (now_ns() - self.start) / 1e9
+        lines = [
+            "Processed {0} files, {1:.1f} MB in {2:.2f}s: {3:.1f} files/s, {4:.2f} MB/s".format(
+                self.files, self.bytes / 1e6, elapsed,
+                self.files / elapsed if elapsed else 0, self.bytes / 1e6 / elapsed if elapsed else 0
+            ),
+            "| " + "Phase / File type".ljust(25) + "|" + "Count".rjust(10) + "|" + "p50 ms".rjust(12) + "|"
+            + "p90 ms".rjust(12) + "|" + "p99 ms".rjust(12) + "|" + "max ms".rjust(12) + "|"
+        ]
+
+        if self._outputs:
+            lines.insert(1, "Output modes: " + ", ".join(
+                "{0} {1} files, {2:.1f} MB".format(output, files, totalBytes / 1e6)
+                for output, (files, totalBytes) in sorted(self._outputs.items())
+            ))
+
+        rows = [(phase, self._phases[phase]) for phase in PHASES]
+        rows += [("type " + str(fileType), values) for fileType, values in sorted(self._fileTypes.items(), key=str)]
+        for name, values in rows:
+            if not values:
+                continue
+            values = sorted(values)
+            lines.append(
+                "| " + name.ljust(25) + "|" + str(len(values)).rjust(10) + "|"
+                + "|".join("{0:.3f}".format(percentile(values, q) / 1e6).rjust(12) for q in (50, 90, 99, 100))
+                + "|"
+            )
+
+        return lines
@@ -0,0 +1,148 @@
+import os
+import json
+import heapq
+import tempfile
+
+# Files are sent to the workers in the order they are found, or largest predicted cost first
+SCHEDULE_DISCOVERY = "discovery"
+SCHEDULE_LONGEST_FIRST = "longest-first"
+SCHEDULES = (SCHEDULE_DISCOVERY, SCHEDULE_LONGEST_FIRST)
+
+COST_MODEL_FILE = "cost_model.json"
+
+# Weight of the timings of earlier runs against those of the current run when saving, so the
+# model follows changes to the engine and the runner
+HISTORY_WEIGHT = 0.5
+
+# Samples of every file type, used for types without samples of their own
+_ALL_TYPES = "*"
+
+
+class CostModel:
+    """Predicts the processing time of a file from its type and size.
+
+    Fits a line through the size and processing time of every file processed before,
+    per file type, and is kept as running sums so it is updated in constant time.
+    """
+
+    def __init__(self, path=None):
+        """Loads the model.
+
+        :param str path: An optional file the model is kept in between runs.
+        """
+
+        self.path = path
+        # Per file type: sample count, and the sums of sizes, times, squared sizes and sizes times times
+        self.history = {}  # type: dict
+        self.samples = {}  # type: dict
+
+        if path:
+            try:
+                with open(path) as f:
+                    self.history = dict((k, list(v)) for k, v in json.load(f).items())
+            except (OSError, ValueError, TypeError, AttributeError):
+                self.history = {}
+
+    def predict(self, fileType, size):
+        """Returns the predicted processing time of a file in nanoseconds.
+
+        :param str fileType: The file type it will be processed as.
+        :param int size: Its size in bytes.
+        :return: The prediction, or None when no file was processed in earlier runs.
+        :rtype: float or None
+        """
+
+        sums = self.history.get(fileType) or self.history.get(_ALL_TYPES)
+        if not sums or sums[0] <= 0:
+            return None
+        n, sx, sy, sxx, sxy = sums
+        denominator = n * sxx - sx * sx
+        if denominator <= 0:
+            # Every sample had the same size
+            return sy / n
+        slope = (n * sxy - sx * sy) / denominator
+        intercept = (sy - slope * sx) / n
+        return max(0.0, intercept + slope * size)
+
+    def add(self, fileType, size, nanoseconds):
+        """Records the processing time of a file.
+
+        :param str fileType: The file type it was processed as.
+        :param int size: Its size in bytes.
+        :param int nanoseconds: The time it took.
+        """
+
+        for key in (fileType, _ALL_TYPES):
+            sums = self.samples.setdefault(key, [0, 0, 0, 0, 0])
+            sums[0] += 1
+            sums[1] += size
+            sums[2] += nanoseconds
+            sums[3] += size * size
+            sums[4] += size * nanoseconds
+
+    def save(self):
+        """Merges the times recorded in this run into the history and writes it to the model file."""
+
+        if not self.path or not self.samples:
+            return
+
+        history = {}
+        for key in set(self.history) | set(self.samples):
+            old = self.history.get(key, [0, 0, 0, 0, 0])
+            new = self.samples.get(key, [0, 0, 0, 0, 0])
+            history[key] = [HISTORY_WEIGHT * o + n for o, n in zip(old, new)]
+
+        directory = os.path.dirname(self.path) or "."
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        # Written aside and renamed, so concurrent runs never read a partial model
+        fd, tempPath = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(history, f)
+        os.replace(tempPath, self.path)
+
+
+def predicted_makespan(costs, workers):
+    """Returns how long workers take to process files sent in the given order, each to the
+    first worker to become free.
+
+    :param list costs: The predicted time of each file, in the order they are sent.
+    :param int workers: The number of workers.
+    :rtype: float
+    """
+
+    free = [0.0] * workers
+    for cost in costs:
+        heapq.heappush(free, heapq.heappop(free) + cost)
+    return max(free)
+
+
+def longest_first(paths, fileType, model, workers):
+    """Orders files by decreasing predicted processing time, or decreasing size without a prediction.
+
+    The longest files start first and the shortest are left to fill the gaps at the end, so
+    the workers finish close together.
+
+    :param iterable paths: The files to process.
+    :param str fileType: The file type they will be processed as.
+    :param CostModel model: The model predicting processing times.
+    :param int workers: The number of workers.
+    :return: The ordered file paths, and the predicted makespan in nanoseconds, or None when
+        there is no model to predict from.
+    :rtype: tuple
+    """
+
+    sized = []
+    for path in paths:
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            size = 0
+        sized.append((model.predict(fileType, size), size, path))
+
+    if any(cost is None for cost, _, _ in sized):
+        sized.sort(key=lambda item: (-item[1], item[2]))
+        return [path for _, _, path in sized], None
+
+    sized.sort(key=lambda item: (-item[0], -item[1], item[2]))
+    return [path for _, _, path in sized], predicted_makespan([cost for cost, _, _ in sized], workers)
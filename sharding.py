@@ -0,0 +1,58 @@
+import os
+import heapq
+
+
+def partition(sizes, shardCount):
+    """Splits files into shards holding as close to the same number of bytes as possible.
+
+    Files are placed largest first, each in the shard holding the fewest bytes so far.
+    Ties are broken by path and by shard number, so every caller given the same files
+    computes the same split.
+
+    :param dict sizes: The size in bytes of each file, keyed by a path that is the same for
+        every caller, such as one relative to the scanned directory.
+    :param int shardCount: The number of shards.
+    :return: The shard number of each path.
+    :rtype: dict
+    """
+
+    shards = [(0, shard) for shard in range(shardCount)]
+    assignment = {}
+    for path in sorted(sizes, key=lambda p: (-sizes[p], p)):
+        total, shard = heapq.heappop(shards)
+        assignment[path] = shard
+        heapq.heappush(shards, (total + sizes[path], shard))
+    return assignment
+
+
+def shard_files(paths, root, shardIndex, shardCount):
+    """Returns the files of one shard, in the order given.
+
+    Files are keyed by their real path relative to root, so a file reached through a
+    symlink lands in the same shard whichever of its paths was found. The paths must be
+    found in the same order by every caller, see discovery.discover_files(ordered=True),
+    for the same one of several hardlinks to a file to be kept by each.
+
+    :param list paths: The files discovered under root.
+    :param str root: The scanned directory, shards are computed from paths relative to it.
+    :param int shardIndex: The shard to return, from 0 to shardCount - 1.
+    :param int shardCount: The number of shards.
+    :return: The file paths of the shard, its size in bytes and the size of all shards.
+    :rtype: tuple
+    """
+
+    realRoot = os.path.realpath(root)
+    keys = dict((path, os.path.relpath(os.path.realpath(path), realRoot)) for path in paths)
+
+    sizes = {}
+    for path in paths:
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            size = 0
+        sizes[keys[path]] = size
+
+    assignment = partition(sizes, shardCount)
+    shard = [path for path in paths if assignment[keys[path]] == shardIndex]
+    shardBytes = sum(size for path, size in sizes.items() if assignment[path] == shardIndex)
+    return shard, shardBytes, sum(sizes.values())